@@ -1,13 +1,18 @@
 from .cli import main
 
 if __name__ == "__main__":
+    import sys
+
+    from .errors import SpecError
+
     try:
         main()
+    except SpecError as e:
+        print(e.pretty(), file=sys.stderr)
+        sys.exit(3)
     except SystemExit:
         raise
     except Exception as e:
         # Fallback for unexpected errors that are not SpecError
-        import sys
         print(f"[U901] {e}", file=sys.stderr)
         sys.exit(3)
-
@@ -0,0 +1,210 @@
+"""Batch entry: generate many chip variants from a JSON manifest in one process.
+
+Provides CLI via `python -m generator.iomux.batch <manifest.json>`.
+"""
+
+import argparse
+import json
+import os
+import sys
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Set, Tuple
+
+from .cache import ModelCache, cache_key, file_digest
+from .codegen import MUX_STYLES, TB_STYLES, valid_tb_shards
+from .driver import build_model, generate_outputs, open_workbook, select_sheet
+from .errors import SpecError
+from .excel import load_grid
+from .models import ExcelModel
+from .output import OutputWriter
+from .utils import padtype_key
+
+
+@dataclass
+class Variant:
+    name: str
+    input: str
+    outdir: str
+    pad_types: Dict[str, str]
+    mux_exclude: Set[str] = field(default_factory=set)
+    sheet: Optional[str] = None
+    mux_style: str = "unrolled"
+    tb_style: str = "unrolled"
+    tb_shards: Optional[str] = None
+
+
+def _pad_map(spec) -> Dict[str, str]:
+    pairs = spec.items() if isinstance(spec, dict) else spec
+    return {padtype_key(n): str(d).upper() for (n, d) in pairs}
+
+
+def load_manifest(path: str) -> List[Variant]:
+    # 매니페스트 자체의 실수(읽기/JSON/필수 키/옵션 값)는 U904로 보고한다
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError) as e:
+        raise SpecError("U904", {"manifest": path, "reason": str(e)})
+    if not isinstance(data, dict) or not isinstance(data.get("variants", []), list) or not isinstance(data.get("defaults", {}), dict):
+        raise SpecError("U904", {"manifest": path, "reason": "expected an object with a 'variants' list and optional 'defaults' object"})
+    root = os.path.dirname(os.path.abspath(path))
+    defaults = data.get("defaults", {})
+    out: List[Variant] = []
+    for k, raw in enumerate(data.get("variants", [])):
+        if not isinstance(raw, dict):
+            raise SpecError("U904", {"variant": f"variant{k}", "reason": "variant must be an object"})
+        v = dict(defaults)
+        v.update(raw)
+        name = str(v.get("name") or f"variant{k}")
+        if not v.get("input") or not v.get("outdir"):
+            raise SpecError("U904", {"variant": name, "reason": "input/outdir missing in manifest"})
+        if (v.get("mux_style") or "unrolled") not in MUX_STYLES:
+            raise SpecError("U904", {"variant": name, "reason": f"unknown mux_style {v.get('mux_style')!r}"})
+        if (v.get("tb_style") or "unrolled") not in TB_STYLES:
+            raise SpecError("U904", {"variant": name, "reason": f"unknown tb_style {v.get('tb_style')!r}"})
+        shards = v.get("tb_shards")
+        if shards is not None:
+            shards = str(shards)
+            if not valid_tb_shards(shards) or (v.get("tb_style") or "unrolled") != "table":
+                raise SpecError("U904", {"variant": name, "reason": f"tb_shards {shards!r} needs tb_style 'table' and 'mode', 'submode' or a positive integer"})
+        pad_types = _pad_map(v.get("pad_types") or {})
+        if not pad_types:
+            raise SpecError("P201", {"variant": name})
+        out.append(
+            Variant(
+                name=name,
+                input=os.path.join(root, v["input"]),
+                outdir=os.path.join(root, v["outdir"]),
+                pad_types=pad_types,
+                mux_exclude=set(v.get("mux_exclude") or []),
+                sheet=v.get("sheet") or None,
+                mux_style=v.get("mux_style") or "unrolled",
+                tb_style=v.get("tb_style") or "unrolled",
+                tb_shards=shards,
+            )
+        )
+    return out
+
+
+def _emit_variant(model: ExcelModel, sheet_title: str, xlsx_path: str, outdir: str, incremental: bool, mux_style: str = "unrolled", tb_style: str = "unrolled", tb_shards: Optional[str] = None):
+    # 워커 프로세스에서도 호출되므로 SpecError는 (eid, ctx)로 돌려준다(예외 pickle 회피)
+    try:
+        out = OutputWriter(outdir, incremental=incremental)
+        NI, NO = generate_outputs(model, sheet_title, xlsx_path, outdir, out=out, mux_style=mux_style, tb_style=tb_style, tb_shards=tb_shards)
+        return (NI, NO, out.summary()), None
+    except SpecError as e:
+        return None, (e.eid, e.ctx)
+
+
+def run_batch(
+    variants: List[Variant],
+    jobs: int = 1,
+    cache: Optional[ModelCache] = None,
+    incremental: bool = False,
+) -> List[Tuple[Variant, Optional[str], Optional[Tuple[int, int, str]], Optional[SpecError]]]:
+    # 1) 모델 준비: 워크북은 파일당 한 번 열고, 같은 (파일, 시트)의 그리드/모델은 variant 간 공유
+    digests: Dict[str, str] = {}
+    wbs = {}
+    grids: Dict[Tuple[str, Optional[str]], tuple] = {}
+    models: Dict[tuple, Tuple[str, ExcelModel]] = {}
+    prepared: List[Tuple[Variant, Optional[Tuple[str, ExcelModel]], Optional[SpecError]]] = []
+    try:
+        for v in variants:
+            mkey = (v.input, v.sheet, tuple(sorted(v.pad_types.items())), tuple(sorted(v.mux_exclude)))
+            try:
+                if mkey not in models:
+                    ckey = None
+                    hit = None
+                    if cache is not None:
+                        if v.input not in digests:
+                            digests[v.input] = file_digest(v.input)
+                        ckey = cache_key(digests[v.input], v.sheet, v.pad_types, v.mux_exclude)
+                        hit = cache.get(ckey)
+                    if hit is None:
+                        if v.input not in wbs:
+                            wbs[v.input] = open_workbook(v.input)
+                        gkey = (v.input, v.sheet)
+                        if gkey not in grids:
+                            ws, g = select_sheet(wbs[v.input], v.sheet)
+                            tkey = (v.input, ws.title)
+                            if tkey not in grids:
+                                grids[tkey] = (ws, g if g is not None else load_grid(ws))
+                            grids[gkey] = grids[tkey]
+                        ws, g = grids[gkey]
+                        hit = (ws.title, build_model(ws, g, v.pad_types, v.mux_exclude))
+                        if cache is not None:
+                            cache.put(ckey, hit[0], hit[1])
+                    models[mkey] = hit
+                prepared.append((v, models[mkey], None))
+            except SpecError as e:
+                prepared.append((v, None, e))
+    finally:
+        for wb in wbs.values():
+            wb.close()
+    grids.clear()
+
+    # 2) 생성: variant 단위로 (선택적으로) 프로세스 풀에서 병렬 실행
+    todo = [k for k, (_, m, _) in enumerate(prepared) if m is not None]
+    emitted = {}
+    if jobs > 1 and len(todo) > 1:
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(max_workers=jobs) as ex:
+            futs = {}
+            for k in todo:
+                v, (sheet_title, model), _ = prepared[k]
+                futs[k] = ex.submit(_emit_variant, model, sheet_title, v.input, v.outdir, incremental, v.mux_style, v.tb_style, v.tb_shards)
+            for k in todo:
+                emitted[k] = futs[k].result()
+    else:
+        for k in todo:
+            v, (sheet_title, model), _ = prepared[k]
+            emitted[k] = _emit_variant(model, sheet_title, v.input, v.outdir, incremental, v.mux_style, v.tb_style, v.tb_shards)
+
+    results = []
+    for k, (v, m, e) in enumerate(prepared):
+        if e is None:
+            res, err = emitted[k]
+            if err is not None:
+                e = SpecError(*err)
+            results.append((v, m[0], res, e))
+        else:
+            results.append((v, None, None, e))
+    return results
+
+
+def main():
+    ap = argparse.ArgumentParser(description="IO Mux generator batch runner (manifest -> many outdirs)")
+    ap.add_argument("manifest")
+    ap.add_argument("-j", "--jobs", type=int, default=1)
+    ap.add_argument("--no-cache", dest="no_cache", action="store_true")
+    ap.add_argument("--cache-dir", dest="cache_dir")
+    ap.add_argument("--incremental", action="store_true")
+    args = ap.parse_args()
+
+    variants = load_manifest(args.manifest)
+    cache = None if args.no_cache else ModelCache(args.cache_dir)
+    failed = 0
+    for v, sheet, res, err in run_batch(variants, jobs=args.jobs, cache=cache, incremental=args.incremental):
+        if err is not None:
+            failed += 1
+            print(f"[ERR] variant={v.name} {err.pretty()}", file=sys.stderr)
+            continue
+        NI, NO, summary = res
+        inc = f" {summary}" if args.incremental else ""
+        print(f"[OK] variant={v.name} sheet={sheet} NI={NI} NO={NO} outdir={v.outdir}{inc}")
+    if failed:
+        sys.exit(3)
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except SpecError as e:
+        print(e.pretty(), file=sys.stderr)
+        sys.exit(3)
+    except SystemExit:
+        raise
+    except Exception as e:
+        print(f"[U901] {e}", file=sys.stderr)
+        sys.exit(3)
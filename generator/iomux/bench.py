@@ -0,0 +1,351 @@
+"""Scaling benchmarks for the IO Mux generator.
+
+Provides CLI via `python -m generator.iomux.bench {synth,sweep,align,startup} ...`.
+"""
+
+import argparse
+import json
+import math
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from .driver import generate_outputs, load_model
+from .output import OutputWriter
+from .profiling import Profiler, activate
+from .synth import SYNTH_EXCLUDE, SYNTH_PAD_TYPES, spec_for, write_workbook
+from .utils import align_assign_pairs, align_bracket_num, align_decls, align_instance, align_ports
+
+DEFAULT_POINTS = "100x5,500x15,1000x30,2000x45,5000x64"
+MIN_COMPARE_S = 0.005
+
+
+def parse_points(text: str) -> List[Tuple[int, int]]:
+    out = []
+    for tok in text.split(","):
+        tok = tok.strip()
+        if tok:
+            p, s = tok.lower().split("x", 1)
+            out.append((int(p), int(s)))
+    return out
+
+
+def run_point(pads: int, submodes: int, workdir: str, memory: bool = False, **spec_kw) -> Dict[str, Any]:
+    spec = spec_for(pads, submodes, **spec_kw)
+    xlsx = os.path.join(workdir, f"synth_{pads}x{submodes}.xlsx")
+    t0 = time.perf_counter()
+    write_workbook(xlsx, spec)
+    t_synth = time.perf_counter() - t0
+    outdir = os.path.join(workdir, f"out_{pads}x{submodes}")
+    prof = Profiler(trace_memory=memory)
+    with activate(prof):
+        sheet, model = load_model(xlsx, SYNTH_PAD_TYPES, SYNTH_EXCLUDE)
+        generate_outputs(model, sheet, xlsx, outdir, out=OutputWriter(outdir))
+    rep = prof.report()
+    return {
+        "point": f"{pads}x{submodes}",
+        "pads": pads,
+        "submodes": sum(len(s) for s in model.modes.values()),
+        "synth_s": t_synth,
+        "total_s": rep["total"]["wall_s"],
+        "stages": {st["name"]: st["wall_s"] for st in rep["stages"]},
+        "peak_bytes": {st["name"]: st["peak_bytes"] for st in rep["stages"]} if memory else {},
+        "counts": rep["counts"],
+    }
+
+
+def _slope(xs: List[float], ys: List[float]) -> Optional[float]:
+    # log-log 기울기(최소/최대 점 기준): 1≈선형, 2≈2차
+    pts = [(x, y) for x, y in zip(xs, ys) if x > 0 and y > 0]
+    if len(pts) < 2 or pts[0][0] == pts[-1][0]:
+        return None
+    (x0, y0), (x1, y1) = pts[0], pts[-1]
+    return math.log(y1 / y0) / math.log(x1 / x0)
+
+
+def format_report(results: List[Dict[str, Any]]) -> List[str]:
+    names: List[str] = []
+    for r in results:
+        for k in r["stages"]:
+            if k not in names:
+                names.append(k)
+    names.append("total")
+    size = [r["counts"].get("cells", 0) + r["counts"].get("pads_I", 0) + r["counts"].get("pads_IO", 0) for r in results]
+    NW = max(len(n) for n in names)
+    CW = max(10, max(len(r["point"]) for r in results))
+    L = [f"{'stage'.ljust(NW)}  " + "  ".join(r["point"].rjust(CW) for r in results) + "  slope"]
+    for n in names:
+        ys = [(r["total_s"] if n == "total" else r["stages"].get(n, 0.0)) for r in results]
+        sl = _slope(size, ys)
+        L.append(f"{n.ljust(NW)}  " + "  ".join(f"{y * 1000:.1f}ms".rjust(CW) for y in ys) + "  " + ("-" if sl is None else f"{sl:.2f}"))
+    L.append(f"{'cells'.ljust(NW)}  " + "  ".join(str(r["counts"].get("cells", 0)).rjust(CW) for r in results))
+    L.append(f"{'bytes'.ljust(NW)}  " + "  ".join(str(r["counts"].get("bytes", 0)).rjust(CW) for r in results))
+    return L
+
+
+def compare_baseline(results: List[Dict[str, Any]], baseline: Dict[str, Any], threshold: float) -> List[str]:
+    base = {r["point"]: r for r in baseline.get("results", [])}
+    regress = []
+    for r in results:
+        b = base.get(r["point"])
+        if b is None:
+            continue
+        pairs = [("total", r["total_s"], b["total_s"])]
+        pairs += [(k, v, b["stages"].get(k)) for k, v in r["stages"].items()]
+        for k, new, old in pairs:
+            if old is None or old < MIN_COMPARE_S:
+                continue
+            if new > old * (1.0 + threshold):
+                regress.append(f"{r['point']} {k}: {old * 1000:.1f}ms -> {new * 1000:.1f}ms (+{(new / old - 1) * 100:.0f}%)")
+    return regress
+
+
+# 열 정렬 헬퍼의 이전(행 단위) 구현. align 벤치마크에서 출력 동일성과 속도 비교 기준으로 사용
+def _ref_align_ports(entries):
+    if not entries:
+        return [], 0
+    DIR_W = max((len(e["direction"]) for e in entries if not e.get("iface")), default=0)
+    TYP_W = max((len(e["type"]) for e in entries if not e.get("iface")), default=0)
+    IF_W = max((len(e["iface"]) for e in entries if e.get("iface")), default=0)
+    LEFT_W = max(IF_W, (DIR_W + (1 if TYP_W > 0 else 0) + TYP_W))
+    BITS_W = max(len(e["bits"]) for e in entries) if entries else 0
+    ARR_W = max(len(e["array"]) for e in entries) if entries else 0
+    NAME_W = max(len(e["name"]) for e in entries) if entries else 0
+    lines = []
+    for i, e in enumerate(entries):
+        if e.get("iface"):
+            left = e["iface"].ljust(LEFT_W)
+        else:
+            left = e["direction"].ljust(DIR_W) + (" " if TYP_W > 0 else "") + e["type"].ljust(LEFT_W - DIR_W - (1 if TYP_W > 0 else 0))
+        bits = align_bracket_num(e["bits"], BITS_W)
+        arr = (" " + align_bracket_num(e["array"], ARR_W)) if e["array"] else " " * (ARR_W + 1 if ARR_W > 0 else 1)
+        comma = "," if i < len(entries) - 1 else ""
+        lines.append(f"  {left}  {bits}  {e['name']:<{NAME_W}}{arr}{comma}")
+    return lines, 2
+
+
+def _ref_align_decls(decls):
+    if not decls:
+        return []
+    T_W = max(len(t) for t, _, _ in decls)
+    B_W = max(len(b) for _, b, _ in decls)
+    return [f"  {t.ljust(T_W)}  {align_bracket_num(b, B_W)}  {n};" for t, b, n in decls]
+
+
+def _ref_align_assign_pairs(pairs):
+    if not pairs:
+        return []
+    L_W = max(len(lhs) for lhs, _ in pairs)
+    return [f"  assign {lhs.ljust(L_W)} = {rhs};" for lhs, rhs in pairs]
+
+
+def _ref_align_instance(conns):
+    PW = max(len(k) for k, _ in conns)
+    VW = max(len(v) for _, v in conns)
+    out = ["  ("]
+    for i, (k, v) in enumerate(conns):
+        comma = "," if i < len(conns) - 1 else ""
+        out.append(f"    {k.ljust(PW)} ( {v.ljust(VW)} ){comma}")
+    out.append("  );")
+    return out
+
+
+def _align_inputs(n: int):
+    ports, decls, pairs, conns = [], [], [], []
+    for i in range(n):
+        w = i % 37
+        if i % 11 == 0:
+            ports.append({"direction": "", "type": "", "bits": "", "name": f"if_{i}", "array": f"[0:{w}]", "iface": "if_pad_io.core"})
+        else:
+            ports.append({"direction": ("input", "output", "inout")[i % 3], "type": "logic", "bits": ("" if w < 2 else f"[{w - 1}:0]"), "name": f"sig_{i}", "array": "", "iface": ""})
+        decls.append(("logic", ("" if w < 2 else f"[{w - 1}:0]"), f"w_{i}"))
+        pairs.append((f"test_io[{i:>6}].{('OEN', 'I', 'PE_PU')[i % 3]:<5}", f"(en[{w}] ? core_{w}_io[{i}].OEN : '0)"))
+        conns.append((f".sig_{i}", f"mode_enable[{w}] ? sig_{i} : '0"))
+    return ports, decls, pairs, conns
+
+
+def run_align(sizes: List[int], repeat: int = 5) -> List[Tuple[int, str, float, float]]:
+    cases = [
+        ("align_ports", _ref_align_ports, align_ports, 0),
+        ("align_decls", _ref_align_decls, align_decls, 1),
+        ("align_assign_pairs", _ref_align_assign_pairs, align_assign_pairs, 2),
+        ("align_instance", _ref_align_instance, align_instance, 3),
+    ]
+    rows = []
+    for n in sizes:
+        inputs = _align_inputs(n)
+        for name, ref, new, k in cases:
+            if ref(inputs[k]) != new(inputs[k]):
+                raise AssertionError(f"{name}: output differs from reference at n={n}")
+            t_ref = min(_timeit(ref, inputs[k]) for _ in range(repeat))
+            t_new = min(_timeit(new, inputs[k]) for _ in range(repeat))
+            rows.append((n, name, t_ref, t_new))
+    return rows
+
+
+def _timeit(fn, arg) -> float:
+    import gc
+
+    # timeit과 같이 측정 중에는 GC를 끈다
+    gc.disable()
+    try:
+        t0 = time.perf_counter()
+        fn(arg)
+        return time.perf_counter() - t0
+    finally:
+        gc.enable()
+
+
+STARTUP_CASES = (
+    ("help", ["-m", "generator.iomux", "--help"]),
+    ("import_cli", ["-c", "import generator.iomux.cli"]),
+    ("import_driver", ["-c", "import generator.iomux.driver"]),
+    ("import_codegen", ["-c", "import generator.iomux.codegen.gen_mode_mux, generator.iomux.codegen.gen_submode, generator.iomux.codegen.gen_pad_mux, generator.iomux.codegen.gen_tb"]),
+    ("import_openpyxl", ["-c", "import openpyxl"]),
+)
+
+
+def parse_importtime(text: str) -> List[Tuple[str, int, int]]:
+    # `-X importtime` stderr: "import time: self [us] | cumulative | imported package"
+    rows = []
+    for line in text.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3 or not parts[0].strip().isdigit():
+            continue
+        rows.append((parts[2].strip(), int(parts[0]), int(parts[1])))
+    return rows
+
+
+def run_startup(cases, repeat: int = 5) -> List[Dict[str, Any]]:
+    # 케이스마다 새 인터프리터를 띄워 wall time과 import 시간을 잰다(최소값 기준)
+    root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(p for p in (root, os.environ.get("PYTHONPATH")) if p))
+    results = []
+    for name, argv in cases:
+        best = None
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            p = subprocess.run([sys.executable, "-X", "importtime"] + argv, cwd=root, env=env, capture_output=True, text=True)
+            wall = time.perf_counter() - t0
+            rows = parse_importtime(p.stderr)
+            if best is None or wall < best["wall_s"]:
+                best = {"case": name, "rc": p.returncode, "wall_s": wall, "import_us": sum(r[1] for r in rows), "modules": rows}
+        results.append(best)
+    return results
+
+
+def format_startup(results: List[Dict[str, Any]], top: int = 10) -> List[str]:
+    lines = [f"{'case':<16}  {'wall':>9}  {'imports':>9}  {'modules':>7}  rc"]
+    for r in results:
+        lines.append(f"{r['case']:<16}  {r['wall_s'] * 1000:>7.1f}ms  {r['import_us'] / 1000:>7.1f}ms  {len(r['modules']):>7}  {r['rc']}")
+    for r in results:
+        if top <= 0:
+            break
+        pkg = [m for m in r["modules"] if m[0].split(".")[0] == "generator"]
+        heavy = sorted(r["modules"], key=lambda m: -m[1])[:top]
+        lines.append("")
+        lines.append(f"[{r['case']}] generator.* modules loaded: {len(pkg)}; top {top} by self time:")
+        for mod, self_us, cum_us in heavy:
+            lines.append(f"  {self_us / 1000:>7.2f}ms  (cum {cum_us / 1000:>7.2f}ms)  {mod}")
+    return lines
+
+
+def main():
+    ap = argparse.ArgumentParser(description="IO Mux generator benchmarks")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    sp = sub.add_parser("synth", help="write one synthetic workbook")
+    sp.add_argument("output")
+    sp.add_argument("--pads", type=int, default=100)
+    sp.add_argument("--submodes", type=int, default=5)
+    sp.add_argument("--bus-width", dest="bus_width", type=int, default=8)
+    sp.add_argument("--gpio-width", dest="gpio_width", type=int, default=4)
+    sp.add_argument("--no-io-test", dest="io_test", action="store_false")
+    sp.add_argument("--no-nand-tree", dest="nand_tree", action="store_false")
+
+    sw = sub.add_parser("sweep", help="run the full pipeline over a size sweep")
+    sw.add_argument("--points", default=DEFAULT_POINTS, help="comma separated PADSxSUBMODES")
+    sw.add_argument("--bus-width", dest="bus_width", type=int, default=8)
+    sw.add_argument("--gpio-width", dest="gpio_width", type=int, default=4)
+    sw.add_argument("--no-io-test", dest="io_test", action="store_false")
+    sw.add_argument("--no-nand-tree", dest="nand_tree", action="store_false")
+    sw.add_argument("--memory", action="store_true", help="trace peak memory (slower)")
+    sw.add_argument("--workdir")
+    sw.add_argument("--out", help="write results JSON")
+    sw.add_argument("--baseline", help="compare against a stored results JSON")
+    sw.add_argument("--threshold", type=float, default=0.25, help="allowed slowdown vs baseline (0.25 = +25%%)")
+    al = sub.add_parser("align", help="microbenchmark the column alignment helpers")
+    al.add_argument("--rows", default="10000,100000", help="comma separated row counts")
+    al.add_argument("--repeat", type=int, default=5)
+    st = sub.add_parser("startup", help="measure CLI cold start with python -X importtime")
+    st.add_argument("--repeat", type=int, default=5)
+    st.add_argument("--top", type=int, default=10, help="heaviest modules to list per case (0 = none)")
+    st.add_argument("--run", nargs=argparse.REMAINDER, help="also time `python -m generator.iomux <args...>` (e.g. a cache hit)")
+    st.add_argument("--out", help="write results JSON")
+    args = ap.parse_args()
+
+    if args.cmd == "startup":
+        cases = list(STARTUP_CASES)
+        if args.run:
+            cases.append(("run", ["-m", "generator.iomux"] + args.run))
+        results = run_startup(cases, args.repeat)
+        for line in format_startup(results, args.top):
+            print(line)
+        if args.out:
+            with open(args.out, "w", encoding="utf-8") as f:
+                json.dump({"python": sys.version.split()[0], "results": results}, f, indent=2)
+                f.write("\n")
+        return
+
+    if args.cmd == "align":
+        print(f"{'rows':>8}  {'helper':<20}  {'rowwise':>10}  {'columnar':>10}  speedup")
+        for n, name, t_ref, t_new in run_align([int(x) for x in args.rows.split(",") if x.strip()], args.repeat):
+            print(f"{n:>8}  {name:<20}  {t_ref * 1000:>8.1f}ms  {t_new * 1000:>8.1f}ms  {t_ref / t_new:.2f}x")
+        return
+
+    spec_kw = {"bus_width": args.bus_width, "gpio_width": args.gpio_width, "io_test": args.io_test, "nand_tree": args.nand_tree}
+    if args.cmd == "synth":
+        spec = spec_for(args.pads, args.submodes, **spec_kw)
+        write_workbook(args.output, spec)
+        pt = " ".join(f"-pad_type {k} {v}" for k, v in SYNTH_PAD_TYPES.items())
+        ex = " ".join(f"-mux_exclude {x}" for x in sorted(SYNTH_EXCLUDE))
+        print(f"[OK] {args.output} {spec}")
+        print(f"  python -m generator.iomux -i {args.output} -o <outdir> {pt} {ex}")
+        return
+
+    points = parse_points(args.points)
+    if args.workdir:
+        try:
+            os.makedirs(args.workdir, exist_ok=True)
+        except OSError as e:
+            ap.error(f"--workdir: {e}")
+    with tempfile.TemporaryDirectory(prefix="iomux_bench_", dir=args.workdir) as wd:
+        results = []
+        for pads, subs in points:
+            r = run_point(pads, subs, wd, memory=args.memory, **spec_kw)
+            print(f"[BENCH] {r['point']} submodes={r['submodes']} total={r['total_s'] * 1000:.1f}ms", flush=True)
+            results.append(r)
+    for line in format_report(results):
+        print(line)
+    doc = {"spec": spec_kw, "results": results}
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(doc, f, indent=2)
+            f.write("\n")
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regress = compare_baseline(results, baseline, args.threshold)
+        for line in regress:
+            print(f"[REGRESS] {line}", file=sys.stderr)
+        if regress:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+import hashlib
+import os
+import pickle
+from typing import Dict, Optional, Set, Tuple
+
+from .banner import TOOL_VERSION
+from .models import ExcelModel
+
+# 캐시 파일 포맷: MAGIC + FORMAT(2바이트) + pickle({"key", "sheet", "model"})
+# 모델 클래스 구조가 바뀌면 CACHE_FORMAT을 올려 기존 엔트리를 무효화한다.
+CACHE_MAGIC = b"IOMUXC"
+CACHE_FORMAT = 2
+# 캐시에는 검증을 통과한 모델이 들어가므로, 같은 워크북에서 다른 모델/오류가 나오게 되는
+# 파서(excel.py)·검증(validate.py) 변경은 MODEL_REV를 올려 기존 엔트리를 무효화한다(키에 포함).
+MODEL_REV = 1
+CACHE_SUFFIX = ".pkl"
+CACHE_MAX_ENTRIES = 64
+CACHE_MAX_BYTES = 256 * 1024 * 1024
+
+
+def default_cache_dir() -> str:
+    env = os.environ.get("IOMUX_CACHE_DIR")
+    if env:
+        return env
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "iomux_gen")
+
+
+def file_digest(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def cache_key(xlsx_digest: str, sheet: Optional[str], pad_types: Dict[str, str], mux_exclude: Set[str]) -> str:
+    ident = (
+        CACHE_FORMAT,
+        MODEL_REV,
+        TOOL_VERSION,
+        xlsx_digest,
+        sheet or "",
+        sorted(pad_types.items()),
+        sorted(mux_exclude),
+    )
+    return hashlib.sha256(repr(ident).encode("utf-8")).hexdigest()
+
+
+class ModelCache:
+    def __init__(self, root: Optional[str] = None, max_entries: int = CACHE_MAX_ENTRIES, max_bytes: int = CACHE_MAX_BYTES):
+        self.root = root or default_cache_dir()
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, key + CACHE_SUFFIX)
+
+    def get(self, key: str) -> Optional[Tuple[str, ExcelModel]]:
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                head = f.read(len(CACHE_MAGIC) + 2)
+                if head[: len(CACHE_MAGIC)] != CACHE_MAGIC or int.from_bytes(head[len(CACHE_MAGIC):], "big") != CACHE_FORMAT:
+                    raise ValueError("cache format mismatch")
+                ent = pickle.load(f)
+            if ent.get("key") != key:
+                raise ValueError("cache key mismatch")
+            os.utime(path)
+            return ent["sheet"], ent["model"]
+        except FileNotFoundError:
+            return None
+        except Exception:
+            # 손상/구버전 엔트리는 지우고 miss로 처리
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return None
+
+    def put(self, key: str, sheet: str, model: ExcelModel):
+        path = self._path(key)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(self.root, exist_ok=True)
+            with open(tmp, "wb") as f:
+                f.write(CACHE_MAGIC + CACHE_FORMAT.to_bytes(2, "big"))
+                pickle.dump({"key": key, "sheet": sheet, "model": model}, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, path)
+        except OSError:
+            # 캐시는 최적화일 뿐이므로 쓰기 실패는 무시
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+            return
+        self.evict()
+
+    def evict(self):
+        try:
+            names = [n for n in os.listdir(self.root) if n.endswith(CACHE_SUFFIX)]
+        except OSError:
+            return
+        ents = []
+        for n in names:
+            p = os.path.join(self.root, n)
+            try:
+                st = os.stat(p)
+            except OSError:
+                continue
+            ents.append((st.st_mtime, st.st_size, p))
+        ents.sort(reverse=True)
+        total = 0
+        for k, (_, size, p) in enumerate(ents):
+            total += size
+            if k >= self.max_entries or total > self.max_bytes:
+                try:
+                    os.remove(p)
+                except OSError:
+                    pass
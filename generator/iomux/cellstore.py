@@ -0,0 +1,34 @@
+"""Columnar view of every SigCell in an ExcelModel.
+
+모델 전체 셀을 한 번 훑어 (서브모드 id, PAD 종류, PAD 번호) 평행 배열로 만든다.
+OM 리포트가 이 열을 NumPy로 정렬/gather해 서브모드별 PAD 목록을 한 번에 뽑는다.
+"""
+
+from array import array
+from typing import List
+
+from .models import ExcelModel, SigCell, SubMode
+
+KIND_CODES = {"I": 0, "IO": 1}
+
+
+class CellStore:
+    # 행 순서는 model.modes → subs → cells 순회 순서와 같다.
+    # 열: sub(self.subs 인덱스), kind(KIND_CODES), pad(PAD 번호)
+    def __init__(self, model: ExcelModel):
+        self.subs: List[SubMode] = []
+        self.cells: List[SigCell] = []
+        sub, kind, pad = array("l"), array("l"), array("l")
+        for subs in model.modes.values():
+            for sm in subs:
+                si = len(self.subs)
+                self.subs.append(sm)
+                for c in sm.cells:
+                    self.cells.append(c)
+                    sub.append(si)
+                    kind.append(KIND_CODES[c.pad_kind])
+                    pad.append(c.pad_index)
+        self.sub, self.kind, self.pad = sub, kind, pad
+
+    def __len__(self) -> int:
+        return len(self.cells)
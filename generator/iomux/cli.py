@@ -1,11 +1,9 @@
 import argparse
 import os
 import sys
-import zipfile
 
-from .driver import run_generate
+from .codegen import MUX_STYLES, TB_STYLES, valid_tb_shards
 from .errors import SpecError
-from .utils import padtype_key
 
 
 def main():
@@ -16,19 +14,82 @@ def main():
     ap.add_argument("-pad_type", dest="pad_types", nargs=2, action="append", default=[], metavar=("PAD_CELL_NAME", "DIR"))
     ap.add_argument("-mux_exclude", dest="exclude", action="append", default=[])
     ap.add_argument("--zip", dest="zip_path")
+    ap.add_argument("--no-cache", dest="no_cache", action="store_true")
+    ap.add_argument("--cache-dir", dest="cache_dir")
+    ap.add_argument("--incremental", action="store_true")
+    ap.add_argument("-j", "--jobs", type=int, default=1)
+    ap.add_argument("--profile", dest="profile_path", metavar="JSON")
+    ap.add_argument("--cprofile", dest="cprofile_path", metavar="PSTATS")
+    ap.add_argument("--mux-style", dest="mux_style", choices=MUX_STYLES, default="unrolled")
+    ap.add_argument("--tb-style", dest="tb_style", choices=TB_STYLES, default="unrolled")
+    ap.add_argument("--tb-shards", dest="tb_shards", metavar="mode|submode|N")
+    ap.add_argument("--all-errors", dest="all_errors", action="store_true")
+    ap.add_argument("--om-report", dest="om_report", action="append", choices=("csv", "json"), default=[])
+    ap.add_argument("--watch", action="store_true")
+    ap.add_argument("--watch-interval", dest="watch_interval", type=float, default=1.0)
     args = ap.parse_args()
+    if args.tb_shards is not None:
+        if not valid_tb_shards(args.tb_shards):
+            ap.error("--tb-shards must be 'mode', 'submode' or a positive integer")
+        if args.tb_style != "table":
+            ap.error("--tb-shards requires --tb-style table")
 
     if not args.pad_types:
         raise SpecError("P201")
+    # 무거운 모듈(driver→codegen, cache→pickle/hashlib)은 인자 검사를 통과한 뒤에 import.
+    # openpyxl은 캐시 miss 때 driver.open_workbook에서만 import된다.
+    from .utils import padtype_key
+
     pad_map = {padtype_key(n): d.upper() for (n, d) in args.pad_types}
-    sheet, NI, NO = run_generate(args.input, args.outdir, pad_map, set(args.exclude or []), sheet=args.sheet)
+    if args.watch:
+        from .watch import watch
+
+        watch(args.input, args.outdir, pad_map, set(args.exclude or []), sheet=args.sheet, jobs=args.jobs, interval=args.watch_interval, mux_style=args.mux_style, all_errors=args.all_errors, om_report=args.om_report, tb_style=args.tb_style, tb_shards=args.tb_shards)
+        return
+    from .driver import run_generate
+    from .output import OutputWriter
+    from .profiling import Profiler, activate
+
+    if args.no_cache:
+        cache = None
+    else:
+        from .cache import ModelCache
+
+        cache = ModelCache(args.cache_dir)
+    out = OutputWriter(args.outdir, incremental=args.incremental)
+    prof = Profiler() if args.profile_path else None
+    cprof = None
+    if args.cprofile_path:
+        import cProfile
+
+        cprof = cProfile.Profile()
+        cprof.enable()
+    try:
+        with activate(prof):
+            sheet, NI, NO = run_generate(args.input, args.outdir, pad_map, set(args.exclude or []), sheet=args.sheet, cache=cache, out=out, jobs=args.jobs, mux_style=args.mux_style, all_errors=args.all_errors, om_report=args.om_report, tb_style=args.tb_style, tb_shards=args.tb_shards)
+    finally:
+        if cprof is not None:
+            cprof.disable()
+            cprof.dump_stats(args.cprofile_path)
+    if prof is not None:
+        prof.meta.update({"input": os.path.basename(args.input), "sheet": sheet, "jobs": args.jobs, "cache": not args.no_cache})
+        prof.dump(args.profile_path)
 
     if args.zip_path:
+        import zipfile
+
+        from .output import MANIFEST_NAME
+
         with zipfile.ZipFile(args.zip_path, "w", zipfile.ZIP_DEFLATED) as z:
             for root, _, files in os.walk(args.outdir):
                 for fn in files:
                     fp = os.path.join(root, fn)
-                    z.write(fp, arcname=os.path.relpath(fp, args.outdir))
+                    arc = os.path.relpath(fp, args.outdir)
+                    if arc == MANIFEST_NAME:
+                        continue
+                    z.write(fp, arcname=arc)
+    if args.incremental:
+        print(f"[INC] {out.summary()}")
     print(f"[OK] sheet={sheet} NI={NI} NO={NO} outdir={args.outdir}")
 
 
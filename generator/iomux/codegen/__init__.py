@@ -1,2 +1,12 @@
 """Code generation subpackage for IO Mux generator."""
 
+# CLI가 생성기 모듈을 import하지 않고 선택지를 만들 수 있도록 여기 둔다
+MUX_STYLES = ("unrolled", "compact")
+
+TB_STYLES = ("unrolled", "table")
+TB_SHARD_MODES = ("mode", "submode")
+
+
+def valid_tb_shards(spec: str) -> bool:
+    # "mode" | "submode" | 양의 정수(shard 개수)
+    return spec in TB_SHARD_MODES or (spec.isdigit() and int(spec) > 0)
@@ -1,7 +1,13 @@
-from typing import Dict, List, Set, Tuple
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterator, List, Optional, Set, Tuple
 
 from ..errors import SpecError
-from ..models import SubMode
+from ..models import SigCell, SubMode
+from ..utils import build_en_index, is_active_low_oe, is_gpio_like, sv_id
+
+# if_pad_in/if_pad_io 필드(mode_mux OR, pad_mux 선택, 평가기 출력 순서)
+IN_FIELDS = ("PE", "PS", "ST", "IE")
+IO_FIELDS = ("OEN", "I", "DS", "PE_PU", "PS_PD", "ST", "IE")
 
 
 def short_sm_name(name: str) -> str:
@@ -9,13 +15,68 @@ def short_sm_name(name: str) -> str:
     return re.sub(r"^(normal_|scan_|ipdt_)", "", name, flags=re.I)
 
 
-def build_bus_maps_for_mode(subs: List[SubMode]):
+@dataclass
+class BusMaps:
+    sig_w: Dict[str, int]
+    sig_dir: Dict[str, str]  # 'output' | 'input' (서브모드 쪽 포트 방향)
+    en_w: Dict[str, int]
+    en_index: Dict[str, List[str]] = field(init=False, repr=False)
+
+    def __post_init__(self):
+        self.en_index = build_en_index(self.en_w)
+
+
+@dataclass
+class ModeMaps(BusMaps):
+    per_sub: List[Tuple[SubMode, Dict[str, int], Dict[str, str]]] = field(default_factory=list)
+
+
+@dataclass
+class SignalIndex:
+    modes: Dict[str, ModeMaps]
+    subs: Dict[Tuple[str, str], BusMaps]
+    glob: BusMaps
+
+    def mode_maps(self) -> Dict[str, Tuple[Dict[str, int], Dict[str, str], Dict[str, int]]]:
+        return {m: (mm.sig_w, mm.sig_dir, mm.en_w) for m, mm in self.modes.items()}
+
+
+def _width(idx: Set[int]) -> int:
+    return max(idx) + 1 if idx else 1
+
+
+def build_sub_maps(sm: SubMode) -> BusMaps:
+    sig_map: Dict[str, Dict[str, object]] = {}
+    en_map: Dict[str, Set[int]] = {}
+    for c in sm.cells:
+        base = c.base
+        want = "output" if c.direction == "I" else "input"
+        ent = sig_map.setdefault(base, {"dir": want, "idx": set()})
+        if ent["dir"] != want:
+            raise SpecError("U902", {"base": base, "submode": sm.name})
+        if c.base_idx is not None:
+            ent["idx"].add(c.base_idx)
+        if c.enable:
+            eb = c.enable.split("[")[0]
+            s = en_map.setdefault(eb, set())
+            if c.enable_idx is not None:
+                s.add(c.enable_idx)
+    return BusMaps(
+        {b: _width(v["idx"]) for b, v in sig_map.items()},
+        {b: v["dir"] for b, v in sig_map.items()},
+        {b: _width(v) for b, v in en_map.items()},
+    )
+
+
+def build_mode_maps(subs: List[SubMode], sub_maps: Dict[Tuple[str, str], BusMaps] = None) -> ModeMaps:
+    # 모드 하나를 한 번 훑어 모드/서브모드 단위 폭·방향·enable 맵을 함께 만든다
     sig_map: Dict[str, Dict[str, object]] = {}
     en_map: Dict[str, Set[int]] = {}
     per_sub = []
     for sm in subs:
         l_sig: Dict[str, Set[int]] = {}
         l_dir: Dict[str, str] = {}
+        l_en: Dict[str, Set[int]] = {}
         for c in sm.cells:
             base = c.base
             want = "output" if c.direction == "I" else "input"
@@ -33,27 +94,143 @@ def build_bus_maps_for_mode(subs: List[SubMode]):
             if c.enable:
                 eb = c.enable.split("[")[0]
                 s = en_map.setdefault(eb, set())
+                ls = l_en.setdefault(eb, set())
                 if c.enable_idx is not None:
                     s.add(c.enable_idx)
-        per_sub.append((sm, {b: (max(s) + 1 if s else 1) for b, s in l_sig.items()}, l_dir))
-    sig_w = {b: (max(v["idx"]) + 1 if v["idx"] else 1) for b, v in sig_map.items()}
+                    ls.add(c.enable_idx)
+        l_sig_w = {b: _width(s) for b, s in l_sig.items()}
+        per_sub.append((sm, l_sig_w, l_dir))
+        if sub_maps is not None:
+            sub_maps[(sm.mode, sm.name)] = BusMaps(l_sig_w, l_dir, {b: _width(s) for b, s in l_en.items()})
+    sig_w = {b: _width(v["idx"]) for b, v in sig_map.items()}
     sig_dir = {b: v["dir"] for b, v in sig_map.items()}
-    en_w = {b: (max(v) + 1 if v else 1) for b, v in en_map.items()}
-    return sig_w, sig_dir, en_w, per_sub
+    en_w = {b: _width(v) for b, v in en_map.items()}
+    return ModeMaps(sig_w, sig_dir, en_w, per_sub)
 
 
-def build_bus_maps_global(modes):
+def check_mode_widths(mode: str, mm: ModeMaps):
+    widths_by_base: Dict[str, Set[int]] = {}
+    for sm, l_sig_w, _ in mm.per_sub:
+        for b, w in l_sig_w.items():
+            widths_by_base.setdefault(b, set()).add(w)
+    for b, ws in widths_by_base.items():
+        if len(ws) > 1:
+            raise SpecError("U903", {"mode": mode, "base": b, "widths": sorted(ws)})
+
+
+def merge_global(mode_maps: Dict[str, BusMaps]) -> BusMaps:
     g_sig_w: Dict[str, int] = {}
     g_en_w: Dict[str, int] = {}
     g_dir: Dict[str, str] = {}
     for mode in ("normal", "scan", "ipdt"):
-        sig_w, sig_dir, en_w, _ = build_bus_maps_for_mode(modes[mode])
-        for b, w in sig_w.items():
-            if b in g_dir and g_dir[b] != sig_dir[b]:
+        mm = mode_maps[mode]
+        for b, w in mm.sig_w.items():
+            if b in g_dir and g_dir[b] != mm.sig_dir[b]:
                 raise SpecError("U902", {"base": b})
             g_sig_w[b] = max(g_sig_w.get(b, 0), w)
-            g_dir[b] = sig_dir[b]
-        for b, w in en_w.items():
+            g_dir[b] = mm.sig_dir[b]
+        for b, w in mm.en_w.items():
             g_en_w[b] = max(g_en_w.get(b, 0), w)
-    return g_sig_w, g_dir, g_en_w
+    return BusMaps(g_sig_w, g_dir, g_en_w)
+
+
+def build_signal_index(modes: Dict[str, List[SubMode]]) -> SignalIndex:
+    # validate 이후 한 번만 계산해 모든 codegen이 공유한다.
+    # 오류 순서는 기존 생성 순서(모드별 U902→U903, 이후 모드 간 U902)와 같다.
+    mode_maps: Dict[str, ModeMaps] = {}
+    sub_maps: Dict[Tuple[str, str], BusMaps] = {}
+    for mode in ("normal", "scan", "ipdt"):
+        mm = build_mode_maps(modes[mode], sub_maps)
+        check_mode_widths(mode, mm)
+        mode_maps[mode] = mm
+    return SignalIndex(mode_maps, sub_maps, merge_global(mode_maps))
+
+
+def build_bus_maps_for_mode(subs: List[SubMode]):
+    mm = build_mode_maps(subs)
+    return mm.sig_w, mm.sig_dir, mm.en_w, mm.per_sub
+
+
+def build_bus_maps_global(modes):
+    g = merge_global({mode: build_mode_maps(modes[mode]) for mode in ("normal", "scan", "ipdt")})
+    return g.sig_w, g.sig_dir, g.en_w
+
+
+# ---- 서브모드 셀 → test_in/test_io 필드 값 (gen_submode 출력과 mux_eval 평가가 함께 쓰는 유일한 표) ----
+TI_IN_VALUES = (("PE", "TI_PE_PU"), ("PS", "TI_PS_PD"), ("ST", "TI_ST"), ("IE", "TI_IE"))
+GPIO_IO_PORTS = (("OEN", "oen"), ("I", "i"), ("DS", "ds"), ("PE_PU", "pe_pu"), ("PS_PD", "ps_pd"), ("ST", "st"), ("IE", "ie"))
+NAND_TO_VALUES = (("PE_PU", "TO_PE_PU"), ("PS_PD", "TO_PS_PD"), ("ST", "TO_ST"), ("IE", "TO_IE"), ("DS", "TO_DS"))
+
+
+def ti_io_values(oen: str) -> Tuple[Tuple[str, str], ...]:
+    return (("PE_PU", "TI_PE_PU"), ("PS_PD", "TI_PS_PD"), ("ST", "TI_ST"), ("IE", "TI_IE"), ("I", "TI_I"), ("OEN", oen), ("DS", "TI_DS"))
+
+
+def to_io_values(oen: str) -> Tuple[Tuple[str, str], ...]:
+    return (("PE_PU", "TO_PE_PU"), ("PS_PD", "TO_PS_PD"), ("ST", "TO_ST"), ("IE", "TO_IE"), ("OEN", oen), ("DS", "TO_DS"))
+
+
+def oen_expr(c: SigCell, def_val: str) -> str:
+    if not c.enable:
+        return def_val
+    en = f"{sv_id(c.enable.split('[')[0])}{('['+str(c.enable_idx)+']') if c.enable_idx is not None else ''}"
+    return en if is_active_low_oe(c.enable) else f"~{en}"
+
+
+def sig_expr(c: SigCell) -> str:
+    return f"{sv_id(c.base)}[{c.base_idx}]" if c.base_idx is not None else sv_id(c.base)
+
+
+def _vec_ref(name: str, idx: int) -> str:
+    return f"{name}[{idx}]"
+
+
+def iter_submode_drives(sm: SubMode, vec: Callable[[str, int], str] = _vec_ref) -> Iterator[Tuple[SigCell, str, str, Optional[str]]]:
+    """일반 서브모드의 할당을 gen_submode 출력 순서로: (셀, 대상, 필드, 값).
+
+    대상 "in"/"io"는 test_in/test_io[c.pad_index].<필드> = 값. "sig"는 셀 신호, "gpio_c"는 `<B>_c[pad]`에
+    `test_en ? PAD.C : default`(값 None). vec(이름, PAD)는 GPIO-like 벡터 포트 참조 표기.
+    """
+    for c in sm.cells:
+        if c.pad_kind == "I":
+            yield c, "sig", "C", None
+            for fld, val in TI_IN_VALUES:
+                yield c, "in", fld, val
+        elif c.pad_kind == "IO":
+            if is_gpio_like(c.base):
+                B = sv_id(c.base)
+                yield c, "gpio_c", "C", None
+                for fld, port in GPIO_IO_PORTS:
+                    yield c, "io", fld, vec(f"{B}_{port}", c.pad_index)
+            else:
+                if c.direction in ("I", "IO"):
+                    yield c, "sig", "C", None
+                    for fld, val in ti_io_values(oen_expr(c, "TI_OEN")):
+                        yield c, "io", fld, val
+                if c.direction in ("O", "IO"):
+                    yield c, "io", "I", sig_expr(c)
+                    for fld, val in to_io_values(oen_expr(c, "TO_OEN")):
+                        yield c, "io", fld, val
+
+
+def iter_nand_in_drives(sm: SubMode) -> Iterator[Tuple[SigCell, str, str, str]]:
+    """nand_tree 입력 쪽(I/IO 방향 셀) 할당: (셀, "in"/"io", 필드, 값). OEN은 enable과 무관하게 TI_OEN."""
+    for c in sm.cells:
+        if c.direction in ("I", "IO"):
+            if c.pad_kind == "I":
+                for fld, val in TI_IN_VALUES:
+                    yield c, "in", fld, val
+            else:
+                for fld, val in ti_io_values("TI_OEN"):
+                    yield c, "io", fld, val
+
+
+def nand_out_cells(sm: SubMode) -> List[SigCell]:
+    return [c for c in sm.cells if c.pad_kind == "IO" and c.direction in ("O", "IO")]
+
 
+def iter_nand_out_drives(c: SigCell, final: str) -> Iterator[Tuple[str, str]]:
+    """nand_tree 출력 셀 하나의 test_io 할당: (필드, 값). I는 NAND 체인 결과 final."""
+    yield "I", final
+    yield from NAND_TO_VALUES
+    yield "OEN", oen_expr(c, "TO_OEN")
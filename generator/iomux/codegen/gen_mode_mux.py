@@ -1,7 +1,6 @@
-from typing import Dict, List, Set, Tuple
+from typing import Dict, Iterator, List, Optional, Tuple
 
 from ..banner import banner
-from ..errors import SpecError
 from ..models import SubMode
 from ..utils import (
     align_assign_pairs,
@@ -17,23 +16,26 @@ from ..utils import (
     sv_id,
     gpio_like_port_entries,
 )
-from .common import build_bus_maps_for_mode, short_sm_name
-
-
-def gen_mode_mux_sv(mode: str, NI: int, NO: int, subs: List[SubMode]):
-    sig_w_map, sig_dir_map, en_w_map, per_sub = build_bus_maps_for_mode(subs)
+from .common import IN_FIELDS, IO_FIELDS, ModeMaps, build_mode_maps, check_mode_widths, short_sm_name
+
+
+def iter_mode_mux_sv(
+    mode: str,
+    NI: int,
+    NO: int,
+    subs: List[SubMode],
+    header: Optional[List[str]] = None,
+    maps: Optional[ModeMaps] = None,
+    style: str = "unrolled",
+) -> Iterator[str]:
+    if maps is None:
+        maps = build_mode_maps(subs)
+        check_mode_widths(mode, maps)
+    sig_w_map, sig_dir_map, en_w_map, per_sub = maps.sig_w, maps.sig_dir, maps.en_w, maps.per_sub
 
     io_test_idx = next((i for i, sm in enumerate(subs) if is_io_test_name(sm.name)), None)
     has_io_test = io_test_idx is not None
 
-    widths_by_base: Dict[str, Set[int]] = {}
-    for sm, l_sig_w, _ in per_sub:
-        for b, w in l_sig_w.items():
-            widths_by_base.setdefault(b, set()).add(w)
-    for b, ws in widths_by_base.items():
-        if len(ws) > 1:
-            raise SpecError("U903", {"mode": mode, "base": b, "widths": sorted(ws)})
-
     ports: List[Dict[str, str]] = []
     marks: List[Tuple[int, str]] = []
 
@@ -65,7 +67,7 @@ def gen_mode_mux_sv(mode: str, NI: int, NO: int, subs: List[SubMode]):
         if is_gpio_like(base):
             ports += gpio_like_port_entries(base, w)
         ports.append({"direction": dir_, "type": "logic", "bits": ("" if w <= 1 else f"[{w-1}:0]"), "name": sv_id(base), "array": "", "iface": ""})
-        for eb in en_names_for_base(base, en_w_map):
+        for eb in en_names_for_base(base, en_w_map, maps.en_index):
             w_en = en_w_map[eb]
             ports.append({"direction": "input", "type": "logic", "bits": ("" if w_en <= 1 else f"[{w_en-1}:0]"), "name": sv_id(eb), "array": "", "iface": ""})
 
@@ -80,18 +82,19 @@ def gen_mode_mux_sv(mode: str, NI: int, NO: int, subs: List[SubMode]):
             if is_gpio_like(base):
                 ports += gpio_like_port_entries(base, w)
             ports.append({"direction": dir_, "type": "logic", "bits": ("" if w <= 1 else f"[{w-1}:0]"), "name": sv_id(base), "array": "", "iface": ""})
-            for eb in en_names_for_base(base, en_w_map):
+            for eb in en_names_for_base(base, en_w_map, maps.en_index):
                 w_en = en_w_map[eb]
                 ports.append({"direction": "input", "type": "logic", "bits": ("" if w_en <= 1 else f"[{w_en-1}:0]"), "name": sv_id(eb), "array": "", "iface": ""})
 
-    L = banner() + [f"module {mode}_mux import gpio_pkg::*; ("]
+    yield from banner(header)
+    yield f"module {mode}_mux import gpio_pkg::*; ("
     port_lines, _ = align_ports(ports)
     mark_map = {i: s for (i, s) in marks}
     for i, line in enumerate(port_lines):
         if i in mark_map:
-            L.append("  " + mark_map[i])
-        L.append(line)
-    L.append(");\n")
+            yield "  " + mark_map[i]
+        yield line
+    yield ");\n"
 
     IDXW_I = max(1, len(str(max(0, NI - 1))))
     IDXW_O = max(1, len(str(max(0, NO - 1))))
@@ -103,9 +106,9 @@ def gen_mode_mux_sv(mode: str, NI: int, NO: int, subs: List[SubMode]):
     for i, (sm, l_sig_w, l_dir) in enumerate(per_sub):
         if is_io_test_name(sm.name):
             continue
-        L.append(f"  // -- integrate {sv_id(sm.name)}")
-        L.append(f"  if_pad_in.core core_{i}_in [0:{max(0, NI-1)}]();")
-        L.append(f"  if_pad_io.core core_{i}_io [0:{max(0, NO-1)}]();")
+        yield f"  // -- integrate {sv_id(sm.name)}"
+        yield f"  if_pad_in.core core_{i}_in [0:{max(0, NI-1)}]();"
+        yield f"  if_pad_io.core core_{i}_io [0:{max(0, NO-1)}]();"
         en_idxW = len(str(max(0, len(per_sub) - 1)))
         conns = [
             (".test_en", f"{mode}_mode_enable{idx_r(i, en_idxW)}"),
@@ -139,13 +142,13 @@ def gen_mode_mux_sv(mode: str, NI: int, NO: int, subs: List[SubMode]):
                 ]
         for eb in sorted(en_w_map.keys()):
             conns.append((f".{sv_id(eb)}", sv_id(eb)))
-        L.append(f"  {sv_id(sm.name)} u_{sv_id(sm.name)}")
-        L += align_instance(conns)
-        L.append("")
+        yield f"  {sv_id(sm.name)} u_{sv_id(sm.name)}"
+        yield from align_instance(conns)
+        yield ""
 
     if out_decls:
-        L += align_decls(out_decls)
-        L.append("")
+        yield from align_decls(out_decls)
+        yield ""
 
     def widen(expr, wi, W):
         if wi == W:
@@ -159,51 +162,85 @@ def gen_mode_mux_sv(mode: str, NI: int, NO: int, subs: List[SubMode]):
         terms = [f"({mode}_mode_enable{idx_r(i, en_idxW)} ? {widen(wi_name, wi, W)} : '0)" for i, wi, wi_name in lst]
         mux_pairs.append((sv_id(base), " | ".join(terms) if terms else "'0"))
     if mux_pairs:
-        L += align_assign_pairs(mux_pairs)
-        L.append("")
+        yield from align_assign_pairs(mux_pairs)
+        yield ""
+
+    # OR-reduction 항 템플릿: 모드당 한 번 만들고 PAD×필드마다 {idx}/{fld}만 채운다
+    en_idxW = len(str(max(0, len(per_sub) - 1)))
+    src_en = [(f"core_{i}_", f"{mode}_mode_enable{idx_r(i, en_idxW)}") for i, (sm, _, _) in enumerate(per_sub) if not is_io_test_name(sm.name)]
+    if has_io_test:
+        src_en.append(("io_test_", f"{mode}_mode_enable{idx_r(io_test_idx, en_idxW)}"))
+
+    def or_template(ifname):
+        return " | ".join(f"({en} ? {src}{ifname}{{idx}}.{{fld}} : '0)" for src, en in src_en)
+
+    tmpl = {"in": or_template("in"), "io": or_template("io")}
+
+    def or_assigns(ifname, lhs, N, idxW, fields, fieldW, lhs_field=True):
+        t = tmpl[ifname]
+        for i in range(N):
+            idxT = idx_r(i, idxW)
+            for fld in fields:
+                f = fld.ljust(fieldW)
+                dst = f"{lhs}{idxT}.{f}" if lhs_field else f"{lhs}{idxT}"
+                yield f"  assign {dst} = {t.format(idx=idxT, fld=f)};"
+
+    def or_generate(ifname, lhs, N, fields, fieldW):
+        t = tmpl[ifname]
+        yield f"    for (gi = 0; gi < {N}; gi++) begin : g_{lhs}"
+        for fld in fields:
+            f = fld.ljust(fieldW)
+            yield f"      assign {lhs}[gi].{f} = {t.format(idx='[gi]', fld=f)};"
+        yield f"      assign c_{ifname}[gi] = {t.format(idx='[gi]', fld='C')};"
+        yield "    end"
 
-    def or_terms(ifname, idx, field, fieldW):
-        en_idxW = len(str(max(0, len(per_sub) - 1)))
-        idxT = idx_r(idx, IDXW_I if ifname == "in" else IDXW_O)
-        core = lambda i: f"core_{i}_{ifname}{idxT}.{field.ljust(fieldW)}"
-        terms = []
-        for i, (sm, _, _) in enumerate(per_sub):
-            if is_io_test_name(sm.name):
-                continue
-            terms.append(f"({mode}_mode_enable{idx_r(i, en_idxW)} ? {core(i)} : '0)")
-        if has_io_test and io_test_idx is not None:
-            src = f"io_test_{'in' if ifname=='in' else 'io'}{idxT}.{field.ljust(fieldW)}"
-            terms.append(f"({mode}_mode_enable{idx_r(io_test_idx, en_idxW)} ? {src} : '0)")
-        return " | ".join(terms)
-
-    pairs = []
-    for i in range(NI):
-        for fld in ("PE", "PS", "ST", "IE"):
-            pairs.append((fmt_if("test_in", i, fld, IDXW_I, FW_I), or_terms("in", i, fld, FW_I)))
-    L += align_assign_pairs(pairs)
-    L.append("")
-    pairs = []
-    for i in range(NO):
-        for fld in ("OEN", "I", "DS", "PE_PU", "PS_PD", "ST", "IE"):
-            pairs.append((fmt_if("test_io", i, fld, IDXW_O, FW_O), or_terms("io", i, fld, FW_O)))
-    L += align_assign_pairs(pairs)
-    L.append("")
     decls = []
     if NI > 0:
         decls.append(("logic", f"[{NI-1}:0]", "c_in"))
     if NO > 0:
         decls.append(("logic", f"[{NO-1}:0]", "c_io"))
-    if decls:
-        L += align_decls(decls)
-        L.append("")
-    pairs = [(f"c_in{idx_r(i, IDXW_I)}", or_terms("in", i, "C", 1)) for i in range(NI)]
-    L += align_assign_pairs(pairs)
-    pairs = [(f"c_io{idx_r(i, IDXW_O)}", or_terms("io", i, "C", 1)) for i in range(NO)]
-    L += align_assign_pairs(pairs)
-    L.append("")
+    if style == "compact":
+        if decls:
+            yield from align_decls(decls)
+            yield ""
+        if NI > 0 or NO > 0:
+            yield "  genvar gi;"
+            yield "  generate"
+            if NI > 0:
+                yield from or_generate("in", "test_in", NI, IN_FIELDS, FW_I)
+            if NO > 0:
+                yield from or_generate("io", "test_io", NO, IO_FIELDS, FW_O)
+            yield "  endgenerate"
+            yield ""
+    else:
+        yield from or_assigns("in", "test_in", NI, IDXW_I, IN_FIELDS, FW_I)
+        yield ""
+        yield from or_assigns("io", "test_io", NO, IDXW_O, IO_FIELDS, FW_O)
+        yield ""
+        if decls:
+            yield from align_decls(decls)
+            yield ""
+        yield from or_assigns("in", "c_in", NI, IDXW_I, ("C",), 1, lhs_field=False)
+        yield from or_assigns("io", "c_io", NO, IDXW_O, ("C",), 1, lhs_field=False)
+        yield ""
     for i in range(NI):
-        L.append(f"  primemas_lib_buf z_buf_{mode}_IN_{i}_C ( .A(c_in{idx_r(i, IDXW_I)}), .Y({fmt_if('test_in', i, 'C', IDXW_I, 1)}) );")
+        yield f"  primemas_lib_buf z_buf_{mode}_IN_{i}_C ( .A(c_in{idx_r(i, IDXW_I)}), .Y({fmt_if('test_in', i, 'C', IDXW_I, 1)}) );"
     for i in range(NO):
-        L.append(f"  primemas_lib_buf z_buf_{mode}_IO_{i}_C ( .A(c_io{idx_r(i, IDXW_O)}), .Y({fmt_if('test_io', i, 'C', IDXW_O, 1)}) );")
-    L.append("endmodule\n")
-    return "\n".join(L), sig_w_map, sig_dir_map, en_w_map
+        yield f"  primemas_lib_buf z_buf_{mode}_IO_{i}_C ( .A(c_io{idx_r(i, IDXW_O)}), .Y({fmt_if('test_io', i, 'C', IDXW_O, 1)}) );"
+    yield "endmodule\n"
+
+
+def gen_mode_mux_sv(
+    mode: str,
+    NI: int,
+    NO: int,
+    subs: List[SubMode],
+    header: Optional[List[str]] = None,
+    maps: Optional[ModeMaps] = None,
+    style: str = "unrolled",
+):
+    if maps is None:
+        maps = build_mode_maps(subs)
+        check_mode_widths(mode, maps)
+    text = "\n".join(iter_mode_mux_sv(mode, NI, NO, subs, header, maps, style))
+    return text, maps.sig_w, maps.sig_dir, maps.en_w
@@ -1,28 +1,29 @@
 import re
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, Iterator, List, Optional, Tuple
 
 from ..banner import banner
 from ..models import ExcelModel
 from ..utils import (
-    align_assign_pairs,
-    align_decls,
     align_ports,
     en_names_for_base,
     fmt_if,
     is_gpio_like,
     is_io_test_name,
+    iter_assign_pairs,
     pad_orientation,
     sv_id,
 )
-from .common import build_bus_maps_global
+from .common import BusMaps, build_mode_maps, merge_global
 
 
-def gen_pad_mux_sv(model: ExcelModel, mode_maps) -> str:
+def iter_pad_mux_sv(model: ExcelModel, mode_maps, header: Optional[List[str]] = None, glob: Optional[BusMaps] = None) -> Iterator[str]:
     NI = len(model.pads_I)
     NO = len(model.pads_IO)
     has_io_test_any = any(any(is_io_test_name(sm.name) for sm in model.modes[m]) for m in ("normal", "scan", "ipdt"))
     has_io_test_mode = {m: any(is_io_test_name(sm.name) for sm in model.modes[m]) for m in ("normal", "scan", "ipdt")}
-    g_sig_w, g_sig_dir, g_en_w = build_bus_maps_global(model.modes)
+    if glob is None:
+        glob = merge_global({mode: build_mode_maps(model.modes[mode]) for mode in ("normal", "scan", "ipdt")})
+    g_sig_w, g_sig_dir, g_en_w = glob.sig_w, glob.sig_dir, glob.en_w
 
     ports: List[Dict[str, str]] = []
     marks: List[Tuple[int, str]] = []
@@ -67,7 +68,7 @@ def gen_pad_mux_sv(model: ExcelModel, mode_maps) -> str:
                 for e in gpio_like_port_entries(base, g_sig_w[base]):
                     add_port(e)
             add_port({"direction": g_sig_dir.get(base, sig_dir_map[base]), "type": "logic", "bits": W, "name": sv_id(base), "array": "", "iface": ""})
-            for eb in en_names_for_base(base, g_en_w):
+            for eb in en_names_for_base(base, g_en_w, glob.en_index):
                 W_en = "" if g_en_w[eb] <= 1 else f"[{g_en_w[eb]-1}:0]"
                 add_port({"direction": "input", "type": "logic", "bits": W_en, "name": sv_id(eb), "array": "", "iface": ""})
 
@@ -116,22 +117,23 @@ def gen_pad_mux_sv(model: ExcelModel, mode_maps) -> str:
         add_port({"direction": "input", "type": "logic", "bits": "", "name": "XIN", "array": "", "iface": ""})
         add_port({"direction": "output", "type": "logic", "bits": "", "name": "XOUT", "array": "", "iface": ""})
 
-    L = banner() + ["module pad_mux import gpio_pkg::*; ("]
+    yield from banner(header)
+    yield "module pad_mux import gpio_pkg::*; ("
     port_lines, _ = align_ports(ports)
     mark_map = {i: s for (i, s) in marks}
     for i, line in enumerate(port_lines):
         if i in mark_map:
-            L.append("  " + mark_map[i])
-        L.append(line)
-    L.append(");\n")
-
-    L.append(f"  if_pad_in.core core_normal_in  [0:{max(0, NI-1)}]();")
-    L.append(f"  if_pad_io.core core_normal_io  [0:{max(0, NO-1)}]();")
-    L.append(f"  if_pad_in.core core_scan_in    [0:{max(0, NI-1)}]();")
-    L.append(f"  if_pad_io.core core_scan_io    [0:{max(0, NO-1)}]();")
-    L.append(f"  if_pad_in.core core_ipdt_in    [0:{max(0, NI-1)}]();")
-    L.append(f"  if_pad_io.core core_ipdt_io    [0:{max(0, NO-1)}]();")
-    L.append("")
+            yield "  " + mark_map[i]
+        yield line
+    yield ");\n"
+
+    yield f"  if_pad_in.core core_normal_in  [0:{max(0, NI-1)}]();"
+    yield f"  if_pad_io.core core_normal_io  [0:{max(0, NO-1)}]();"
+    yield f"  if_pad_in.core core_scan_in    [0:{max(0, NI-1)}]();"
+    yield f"  if_pad_io.core core_scan_io    [0:{max(0, NO-1)}]();"
+    yield f"  if_pad_in.core core_ipdt_in    [0:{max(0, NI-1)}]();"
+    yield f"  if_pad_io.core core_ipdt_io    [0:{max(0, NO-1)}]();"
+    yield ""
 
     for mode in ("normal", "scan", "ipdt"):
         sig_w_map, sig_dir_map, en_w_map = mode_maps[mode]
@@ -160,18 +162,18 @@ def gen_pad_mux_sv(model: ExcelModel, mode_maps) -> str:
             conns.append((f".{sv_id(base)}", sv_id(base)))
         for eb in sorted(en_w_map.keys()):
             conns.append((f".{sv_id(eb)}", sv_id(eb)))
-        L.append(f"  {mode}_mux u_{mode}_mux")
+        yield f"  {mode}_mux u_{mode}_mux"
         from ..utils import align_instance
 
-        L += align_instance(conns)
-        L.append("")
+        yield from align_instance(conns)
+        yield ""
 
     IDXW_I = max(1, len(str(max(0, NI - 1))))
     IDXW_O = max(1, len(str(max(0, NO - 1))))
     FW_I = 2
     FW_O = 5
-    L.append("  logic test_on;")
-    L.append("  assign test_on = |scan_mode_enable | |ipdt_mode_enable;")
+    yield "  logic test_on;"
+    yield "  assign test_on = |scan_mode_enable | |ipdt_mode_enable;"
 
     def sel_expr(ifname, idx, fld, fieldW):
         idxT = f"[{str(idx).rjust(IDXW_I if ifname=='in' else IDXW_O)}]"
@@ -180,20 +182,22 @@ def gen_pad_mux_sv(model: ExcelModel, mode_maps) -> str:
         c = f"core_normal_{ifname}{idxT}.{fld.ljust(fieldW)}"
         return f"test_on ? ( |scan_mode_enable ? {a} : {b} ) : {c}"
 
-    pairs = []
-    for i in range(NI):
-        for fld in ("PE", "PS", "ST", "IE"):
-            pairs.append((fmt_if("pad_in", i, fld, IDXW_I, FW_I), sel_expr("in", i, fld, FW_I)))
-        pairs.append((fmt_if("pad_in", i, "C", IDXW_I, 1), sel_expr("in", i, "C", 1)))
-    L += align_assign_pairs(pairs)
-    L.append("")
-    pairs = []
-    for i in range(NO):
-        for fld in ("OEN", "I", "DS", "PE_PU", "PS_PD", "ST", "IE"):
-            pairs.append((fmt_if("pad_io", i, fld, IDXW_O, FW_O), sel_expr("io", i, fld, FW_O)))
-        pairs.append((fmt_if("pad_io", i, "C", IDXW_O, 1), sel_expr("io", i, "C", 1)))
-    L += align_assign_pairs(pairs)
-    L.append("")
+    IN_FIELDS = [(fld, FW_I) for fld in ("PE", "PS", "ST", "IE")] + [("C", 1)]
+    IO_FIELDS = [(fld, FW_O) for fld in ("OEN", "I", "DS", "PE_PU", "PS_PD", "ST", "IE")] + [("C", 1)]
+
+    def pad_pairs(ifname, N, idxW, fields):
+        for i in range(N):
+            for fld, fW in fields:
+                yield (fmt_if(f"pad_{ifname}", i, fld, idxW, fW), sel_expr(ifname, i, fld, fW))
+
+    def pad_lhs_w(ifname, N, idxW, fields):
+        # fmt_if의 인덱스는 idxW로 rjust되므로 lhs 폭은 PAD 번호와 무관: PAD 0의 lhs만 보면 된다
+        return max(len(fmt_if(f"pad_{ifname}", 0, fld, idxW, fW)) for fld, fW in fields) if N else 0
+
+    yield from iter_assign_pairs(pad_pairs("in", NI, IDXW_I, IN_FIELDS), pad_lhs_w("in", NI, IDXW_I, IN_FIELDS))
+    yield ""
+    yield from iter_assign_pairs(pad_pairs("io", NO, IDXW_O, IO_FIELDS), pad_lhs_w("io", NO, IDXW_O, IO_FIELDS))
+    yield ""
 
     def inst_name(kind: str, idx, base: str, bit: Optional[int], digits: int) -> str:
         try:
@@ -204,11 +208,11 @@ def gen_pad_mux_sv(model: ExcelModel, mode_maps) -> str:
         return f"u_{kind}_{idx_str}_pad_{label}"
 
     if set(model.pads_OSC) >= {"XIN", "XOUT"}:
-        L.append("  // OSC PAD")
-        L.append("  primemas_lib_OSC_PAD #(.ORIENTATION(\"V\")) " f"{inst_name('0', 0, 'XIN_XOUT', None, 3)} ( .XIN(XIN), .XOUT(XOUT), .XE(pad_osc_io.XE), .DS(pad_osc_io.DS), .REF(pad_osc_ref), .RD(pad_osc_rd), .XC(pad_osc_io_XC), .RTE(1'b0) );\n")
-        L.append("  primemas_lib_buf u_osc_anchor ( .A(pad_osc_io_XC), .Y(pad_osc_io.XC) );")
+        yield "  // OSC PAD"
+        yield "  primemas_lib_OSC_PAD #(.ORIENTATION(\"V\")) " f"{inst_name('0', 0, 'XIN_XOUT', None, 3)} ( .XIN(XIN), .XOUT(XOUT), .XE(pad_osc_io.XE), .DS(pad_osc_io.DS), .REF(pad_osc_ref), .RD(pad_osc_rd), .XC(pad_osc_io_XC), .RTE(1'b0) );\n"
+        yield "  primemas_lib_buf u_osc_anchor ( .A(pad_osc_io_XC), .Y(pad_osc_io.XC) );"
 
-    L.append("  // IN PADs")
+    yield "  // IN PADs"
     for i, pr in enumerate(model.pads_I):
         m = re.match(r"^(?P<base>[A-Za-z_]\w*)(?:\[(?P<idx>\d+)\])?$", pr.name)
         base = m.group('base') if m else pr.name
@@ -216,11 +220,11 @@ def gen_pad_mux_sv(model: ExcelModel, mode_maps) -> str:
         pad_sig = f"{sv_id(base)}[{bit}]" if bit is not None else sv_id(base)
         orient = pad_orientation(pr.pad_type)
         name = inst_name('1', (pr.index if pr.index >= 0 else i), base, bit, DIG_I.get(base, 3))
-        L.append(
+        yield (
             f"  primemas_lib_IN_PAD #(.ORIENTATION(\"{orient}\")) {name} ( .PAD({pad_sig}), .PE({fmt_if('pad_in', pr.index, 'PE', max(1, len(str(max(0, NI-1)))), 2)}), .PS({fmt_if('pad_in', pr.index, 'PS', max(1, len(str(max(0, NI-1)))), 2)}), .ST({fmt_if('pad_in', pr.index, 'ST', max(1, len(str(max(0, NI-1)))), 2)}), .IE({fmt_if('pad_in', pr.index, 'IE', max(1, len(str(max(0, NI-1)))), 2)}), .C({fmt_if('pad_in', pr.index, 'C', max(1, len(str(max(0, NI-1)))), 1)}), .RTE(1'b0) );"
         )
-    L.append("")
-    L.append("  // IO PADs")
+    yield ""
+    yield "  // IO PADs"
     for i, pr in enumerate(model.pads_IO):
         m = re.match(r"^(?P<base>[A-Za-z_]\w*)(?:\[(?P<idx>\d+)\])?$", pr.name)
         base = m.group('base') if m else pr.name
@@ -228,9 +232,12 @@ def gen_pad_mux_sv(model: ExcelModel, mode_maps) -> str:
         pad_sig = f"{sv_id(base)}[{bit}]" if bit is not None else sv_id(base)
         orient = pad_orientation(pr.pad_type)
         name = inst_name('2', (pr.index if pr.index >= 0 else i), base, bit, DIG_IO.get(base, 3))
-        L.append(
+        yield (
             f"  primemas_lib_IO_PAD #(.ORIENTATION(\"{orient}\")) {name} ( .PAD({pad_sig}), .OEN({fmt_if('pad_io', pr.index, 'OEN', max(1, len(str(max(0, NO-1)))), 5)}), .I({fmt_if('pad_io', pr.index, 'I', max(1, len(str(max(0, NO-1)))), 5)}), .DS({fmt_if('pad_io', pr.index, 'DS', max(1, len(str(max(0, NO-1)))), 5)}), .PE({fmt_if('pad_io', pr.index, 'PE_PU', max(1, len(str(max(0, NO-1)))), 5)}), .PS({fmt_if('pad_io', pr.index, 'PS_PD', max(1, len(str(max(0, NO-1)))), 5)}), .ST({fmt_if('pad_io', pr.index, 'ST', max(1, len(str(max(0, NO-1)))), 5)}), .IE({fmt_if('pad_io', pr.index, 'IE', max(1, len(str(max(0, NO-1)))), 5)}), .C({fmt_if('pad_io', pr.index, 'C', max(1, len(str(max(0, NO-1)))), 1)}), .RTE(1'b0) );"
         )
 
-    L.append("\nendmodule\n")
-    return "\n".join(L)
+    yield "\nendmodule\n"
+
+
+def gen_pad_mux_sv(model: ExcelModel, mode_maps, header: Optional[List[str]] = None, glob: Optional[BusMaps] = None) -> str:
+    return "\n".join(iter_pad_mux_sv(model, mode_maps, header, glob))
@@ -0,0 +1,486 @@
+import json
+import re
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from ..models import ExcelModel
+from ..mux_eval import ENABLE_BASE
+from ..utils import en_names_for_base, is_active_low_oe, is_gpio_like, is_io_test_name, sv_id
+from .common import BusMaps, build_mode_maps, merge_global
+
+# 스텝 레코드(64비트, tb_steps*.hex 한 줄): [63:60] op, [59] val, [55:28] a, [27:0] b
+OP_END = 0  # 스텝 파일 끝
+OP_BEGIN = 1  # a=테스트 번호<<2 | 모드(0 normal/1 scan/2 ipdt), b=enable 비트 — 모든 모드 disable 후 한 비트만 켜고 스냅샷
+OP_SET = 2  # a=비트, b=벡터(0 tb_fi/1 tb_en), val — OE/IE 등 제어 신호 설정
+OP_FUNC = 3  # a=tb_fi 비트 0→1→0 토글, b=뒤따르는 OP_OBS 개수
+OP_PAD_I = 4  # a=tb_pi 비트 토글, b=OP_OBS 개수
+OP_PAD_IO = 5  # a=tb_pio 비트를 TB가 구동하며 토글, b=OP_OBS 개수
+OP_CHECK = 6  # a=테스트 번호 — masks[a] 비트(다른 서브모드 출력)가 스냅샷과 같은지
+OP_OBS = 7  # a=비트, b=벡터(0 tb_fo/1 tb_pio) — 직전 토글 값과 같아야 하는 관측 비트
+OP_NAMES = {OP_END: "OP_END", OP_BEGIN: "OP_BEGIN", OP_SET: "OP_SET", OP_FUNC: "OP_FUNC", OP_PAD_I: "OP_PAD_I", OP_PAD_IO: "OP_PAD_IO", OP_CHECK: "OP_CHECK", OP_OBS: "OP_OBS"}
+STEP_HEX = 16
+MODE_CODES = {"normal": 0, "scan": 1, "ipdt": 2}
+VEC_FI, VEC_EN = 0, 1
+VEC_FO, VEC_PIO = 0, 1
+# gpio_pkg 상수의 레벨(OE_ENA=0, OE_DIS=1, IE_ENA=1, IE_DIS=0)
+CONST_LEVEL = {"TO_OEN": 0, "TI_OEN": 1, "TI_IE": 1, "TO_IE": 0}
+OE_ON, OE_OFF, IE_ON = 0, 1, 1
+GPIO_IN_PORTS = ("oen", "i", "pe_pu", "ps_pd", "st", "ie")
+SRC_RE = re.compile(r"^(~?)([A-Za-z_$][\w$]*)(?:\[(\d+)\])?$")
+
+
+def step_word(op: int, a: int = 0, b: int = 0, val: int = 0) -> int:
+    return (op << 60) | (val << 59) | (a << 28) | b
+
+
+@dataclass
+class TbTable:
+    # 평탄화 벡터 배치: 포트 이름 → (lo, 폭). 포트는 tb_*[lo+W-1:lo] 슬라이스로 연결.
+    fi: Dict[str, Tuple[int, int]] = field(default_factory=dict)
+    fo: Dict[str, Tuple[int, int]] = field(default_factory=dict)
+    en: Dict[str, Tuple[int, int]] = field(default_factory=dict)
+    pi: Dict[str, Tuple[int, int, int]] = field(default_factory=dict)  # PAD base → (lo, 폭, lsb)
+    pio: Dict[str, Tuple[int, int, int]] = field(default_factory=dict)
+    steps: List[int] = field(default_factory=list)
+    masks: List[int] = field(default_factory=list)  # 테스트별 불변성 마스크 + 마지막: all-disable 때 0이어야 하는 비트
+    tests: List[str] = field(default_factory=list)  # "<mode>.<submode>"
+    spans: List[Tuple[int, int]] = field(default_factory=list)  # 테스트별 steps 구간 [lo, hi)
+    max_obs: int = 0
+    osc: bool = False
+    has_io_test: bool = False
+
+    @staticmethod
+    def width(m) -> int:
+        return sum(v[1] for v in m.values())
+
+
+def _split_pin(pin: str):
+    m = re.match(r"^(?P<base>[A-Za-z_]\w*)(?:\[(?P<idx>\d+)\])?$", pin)
+    if not m:
+        return pin, None
+    idx = m.group("idx")
+    return m.group("base"), (int(idx) if idx is not None else None)
+
+
+def _pad_layout(pads) -> Dict[str, Tuple[int, int, int]]:
+    groups: Dict[str, set] = {}
+    for pr in pads:
+        b, i = _split_pin(pr.name)
+        groups.setdefault(b, set()).add(i)
+    out, lo = {}, 0
+    for base, idxs in sorted(groups.items()):
+        if None in idxs and len(idxs) == 1:
+            out[base] = (lo, 1, 0)
+            lo += 1
+        else:
+            msb = max(i for i in idxs if i is not None)
+            lsb = min(i for i in idxs if i is not None)
+            out[base] = (lo, msb - lsb + 1, lsb)
+            lo += msb - lsb + 1
+    return out
+
+
+def _pad_bit(layout, pin: str) -> Optional[int]:
+    b, i = _split_pin(pin)
+    if b not in layout:
+        return None
+    lo, W, lsb = layout[b]
+    return lo if i is None else lo + i - lsb
+
+
+def _bit(layout: Dict[str, Tuple[int, int]], name: str, idx: Optional[int]) -> Optional[int]:
+    ent = layout.get(name)
+    if ent is None:
+        return None
+    lo, W = ent
+    i = idx or 0
+    return lo + i if i < W else None
+
+
+class _Resolver:
+    # 평가기 값(SV 식 문자열) → TB 벡터 비트
+    def __init__(self, t: TbTable):
+        self.drive = {VEC_FI: {sv_id(k): v for k, v in t.fi.items()}, VEC_EN: {sv_id(k): v for k, v in t.en.items()}}
+        self.fo = {sv_id(k): v for k, v in t.fo.items()}
+
+    def driven(self, src: str) -> Optional[Tuple[int, int, int]]:
+        """(벡터, 비트, 반전) 또는 None"""
+        m = SRC_RE.match(src)
+        if not m:
+            return None
+        idx = int(m.group(3)) if m.group(3) is not None else None
+        for vec, layout in self.drive.items():
+            b = _bit(layout, m.group(2), idx)
+            if b is not None:
+                return vec, b, int(bool(m.group(1)))
+        return None
+
+    def observed(self, name: str) -> Optional[int]:
+        m = SRC_RE.match(name)
+        if not m or m.group(1):
+            return None
+        return _bit(self.fo, m.group(2), int(m.group(3)) if m.group(3) is not None else None)
+
+
+def _level(res: _Resolver, src: str, want: int, steps: List[int]) -> bool:
+    # 필드(OEN/IE)를 want 레벨로 만든다: 상수면 확인만, TB가 구동하는 신호면 OP_SET. 그 외(X/io_test/OR 결합)는 False.
+    if src in CONST_LEVEL:
+        return CONST_LEVEL[src] == want
+    d = res.driven(src)
+    if d is None:
+        return False
+    vec, b, inv = d
+    steps.append(step_word(OP_SET, b, vec, want ^ inv))
+    return True
+
+
+def build_tb_table(model: ExcelModel, glob: Optional[BusMaps] = None, ev=None) -> TbTable:
+    """smoke TB 시퀀스를 스텝/마스크 표로 만들고, 평가기(MuxEvaluator)가 예측한 라우팅을 관측 레코드로 붙인다.
+
+    enable 비트는 pad_mux와 같은 서브모드 위치.
+    """
+    if glob is None:
+        glob = merge_global({mode: build_mode_maps(model.modes[mode]) for mode in ("normal", "scan", "ipdt")})
+    if ev is None:
+        from ..mux_eval import MuxEvaluator
+
+        ev = MuxEvaluator(model)
+    t = TbTable()
+    owner: Dict[str, str] = {}  # tb_fo 포트 → 셀 base(불변성 마스크용)
+    lo_i = lo_o = lo_e = 0
+    for base, W in sorted(glob.sig_w.items()):
+        if is_gpio_like(base):
+            # GPIO-like 포트 묶음(pad_mux와 같은 구성). _ds는 PAD당 4비트.
+            B = sv_id(base)
+            for nm in GPIO_IN_PORTS:
+                t.fi[f"{B}_{nm}"] = (lo_i, W)
+                lo_i += W
+            t.fi[f"{B}_ds"] = (lo_i, 4 * W)
+            lo_i += 4 * W
+            t.fo[f"{B}_c"] = (lo_o, W)
+            owner[f"{B}_c"] = base
+            lo_o += W
+        if glob.sig_dir.get(base) == "input":
+            t.fi[base] = (lo_i, W)
+            lo_i += W
+        else:
+            t.fo[base] = (lo_o, W)
+            owner[base] = base
+            lo_o += W
+    for base in sorted(glob.sig_w.keys()):
+        for eb in en_names_for_base(base, glob.en_w, glob.en_index):
+            if eb in t.en:
+                continue
+            t.en[eb] = (lo_e, glob.en_w[eb])
+            lo_e += glob.en_w[eb]
+    t.pi = _pad_layout(model.pads_I)
+    t.pio = _pad_layout(model.pads_IO)
+    t.osc = set(model.pads_OSC) >= {"XIN", "XOUT"}
+    en_pos = {sv_id(eb): lo for eb, (lo, _) in t.en.items()}
+    res = _Resolver(t)
+    src = ev.sources
+    pos = ev.pad_pos
+
+    tests = []
+    for mode in ("normal", "scan", "ipdt"):
+        for k, sm in enumerate(model.modes[mode]):
+            if is_io_test_name(sm.name):
+                t.has_io_test = True
+                continue
+            tests.append((mode, k, sm))
+    E = ev.np.zeros((len(tests) + 1, 64), dtype=bool)
+    for n, (mode, k, _) in enumerate(tests):
+        E[n, ENABLE_BASE[mode] + k] = True
+    pred = ev.evaluate(E)  # 마지막 행: all disable
+
+    for n, (mode, k, sm) in enumerate(tests):
+        t.tests.append(f"{mode}.{sv_id(sm.name)}")
+        lo_step = len(t.steps)
+        t.steps.append(step_word(OP_BEGIN, (n << 2) | MODE_CODES[mode], k))
+        sm_bases = {c.base for c in sm.cells}
+        mask = 0
+        for b, (lo, W) in t.fo.items():
+            if owner[b] not in sm_bases:
+                mask |= ((1 << W) - 1) << lo
+        t.masks.append(mask)
+        pad_row = pred.pad[n].tolist()
+        # PAD 핀 → 그 핀 값을 그대로 내보내야 하는 tb_fo 비트들
+        fans: Dict[str, List[int]] = {}
+        for name, v in zip(ev.func_outputs, pred.func[n].tolist()):
+            if v > 1:
+                b = res.observed(name)
+                if b is not None:
+                    fans.setdefault(src[v], []).append(b)
+
+        def pad_field(kind: str, p: int, fld: str) -> str:
+            return src[pad_row[pos[(kind, p, fld)]]]
+
+        def toggle(op: int, a: int, obs: List[Tuple[int, int]]):
+            t.steps.append(step_word(op, a, len(obs)))
+            t.steps.extend(step_word(OP_OBS, b, vec) for vec, b in obs)
+            t.max_obs = max(t.max_obs, len(obs))
+
+        for c in sm.cells:
+            p = c.pad_index
+            if c.direction in ("O", "IO") and c.pad_kind == "IO":
+                # 출력 경로: PAD .I를 구동하는 신호를 토글하고 OE가 켜져 있으면 PAD 핀에서 관측
+                pre: List[int] = []
+                oe_ok = _level(res, pad_field("IO", p, "OEN"), OE_ON, pre)
+                d = res.driven(pad_field("IO", p, "I"))
+                pin = _pad_bit(t.pio, model.pads_IO[p].name)
+                if d is not None and d[0] == VEC_FI and not d[2] and pin is not None:
+                    t.steps.extend(pre)
+                    toggle(OP_FUNC, d[1], [(VEC_PIO, pin)] if oe_ok else [])
+                else:
+                    # 예측 불가(X/상수/내부 신호): 기본 시퀀스대로 자극만
+                    if c.enable:
+                        e = en_pos.get(sv_id(c.enable.split("[")[0]))
+                        if e is not None:
+                            t.steps.append(step_word(OP_SET, e + (c.enable_idx or 0), VEC_EN, 0 if is_active_low_oe(c.enable) else 1))
+                    b = _bit(t.fi, c.base, c.base_idx)
+                    if b is not None:
+                        toggle(OP_FUNC, b, [])
+            if c.direction in ("I", "IO"):
+                # 입력 경로: PAD 핀을 토글하고 출력 드라이버가 꺼져 있고 IE가 켜져 있으면 기능 출력에서 관측
+                kind = c.pad_kind
+                pads = model.pads_I if kind == "I" else model.pads_IO
+                pin = _pad_bit(t.pi if kind == "I" else t.pio, pads[p].name)
+                if pin is None:
+                    continue
+                pre = []
+                ok = kind == "I" or _level(res, pad_field("IO", p, "OEN"), OE_OFF, pre)
+                ok = _level(res, pad_field(kind, p, "IE"), IE_ON, pre) and ok
+                t.steps.extend(pre)
+                obs = [(VEC_FO, b) for b in fans.get(sv_id(pads[p].name), [])] if ok else []
+                toggle(OP_PAD_I if kind == "I" else OP_PAD_IO, pin, obs)
+        t.steps.append(step_word(OP_CHECK, n))
+        t.spans.append((lo_step, len(t.steps)))
+
+    zero = 0
+    for name, v in zip(ev.func_outputs, pred.func[len(tests)].tolist()):
+        b = res.observed(name)
+        if v == 0 and b is not None:
+            zero |= 1 << b
+    t.masks.append(zero)
+    return t
+
+
+def shard_tests(t: TbTable, spec: Optional[str]) -> List[Tuple[str, List[int]]]:
+    """테스트 분할: None → 전체 하나, "mode" → 모드별, "submode" → 테스트별, 정수 N → 스텝 수 기준 N개 균형 분할."""
+    every = list(range(len(t.tests)))
+    if not spec or not every:
+        # 테스트가 없는 모델(io_test뿐이거나 서브모드 없음)도 OP_END만 있는 shard 하나는 만든다
+        return [("all", every)]
+    if spec == "submode":
+        return [(t.tests[n].replace(".", "_"), [n]) for n in every]
+    if spec == "mode":
+        groups: Dict[str, List[int]] = {}
+        for n in every:
+            groups.setdefault(t.tests[n].split(".", 1)[0], []).append(n)
+        return list(groups.items())
+    N = max(1, min(int(spec), len(every)))
+    # 큰 테스트부터 가장 가벼운 shard에 배정(LPT), shard 안은 원래 순서
+    load = [0] * N
+    bins: List[List[int]] = [[] for _ in range(N)]
+    for n in sorted(every, key=lambda n: (-(t.spans[n][1] - t.spans[n][0]), n)):
+        j = load.index(min(load))
+        bins[j].append(n)
+        load[j] += t.spans[n][1] - t.spans[n][0]
+    return [(str(j), sorted(b)) for j, b in enumerate(bins) if b]
+
+
+def shard_steps(t: TbTable, tests: List[int]) -> List[int]:
+    out = [w for n in tests for w in t.steps[t.spans[n][0] : t.spans[n][1]]]
+    out.append(step_word(OP_END))
+    return out
+
+
+def iter_tb_steps_hex(steps: List[int]) -> Iterator[str]:
+    for w in steps:
+        yield f"{w:0{STEP_HEX}x}"
+
+
+def iter_tb_masks_hex(t: TbTable) -> Iterator[str]:
+    nd = (max(1, t.width(t.fo)) + 3) // 4
+    for m in t.masks:
+        yield f"{m:0{nd}x}"
+
+
+def iter_testbench_table_sv(t: TbTable, nstep: Optional[int] = None) -> Iterator[str]:
+    # nstep: 가장 긴 스텝 파일의 줄 수(shard가 모두 같은 TB를 쓰므로 배열은 최대 크기)
+    NFI, NFO, NEN = t.width(t.fi), t.width(t.fo), t.width(t.en)
+    NPI, NPIO = t.width(t.pi), t.width(t.pio)
+    if nstep is None:
+        nstep = len(t.steps) + 1
+
+    yield "`timescale 1ns/1ps"
+    yield ""
+    yield "// Auto-generated table-driven self-checking testbench for pad_mux"
+    yield "// stimulus + expected routing: STEPS_FILE or +STEPS=<file> (one 64-bit step per line, shards share this TB)"
+    yield "// stable-check masks: MASKS_FILE (one per submode, last line: outputs that must be 0 with all modes disabled)"
+    yield ""
+    yield "module testbench;"
+    yield ""
+    yield "  parameter string STEPS_FILE = \"tb_steps.hex\";"
+    yield "  parameter string MASKS_FILE = \"tb_masks.hex\";"
+    yield ""
+    # NMASK(= 테스트 수 + 1)는 clamp하지 않는다: 마지막 줄(all-disable 마스크)은 항상 masks[NMASK-1]
+    for name, v in (("NFI", NFI), ("NFO", NFO), ("NEN", NEN), ("NPI", NPI), ("NPIO", NPIO), ("NSTEP", nstep), ("NTEST", len(t.tests)), ("NMASK", len(t.masks)), ("NOBS", t.max_obs)):
+        yield f"  localparam int {name.ljust(5)} = {max(1, v)};"
+    for op, name in OP_NAMES.items():
+        yield f"  localparam logic [3:0] {name.ljust(9)} = 4'd{op};"
+    yield ""
+
+    yield "  // mode enables"
+    yield "  logic [31:0] normal_mode_enable;"
+    yield "  logic [15:0] scan_mode_enable;"
+    yield "  logic [15:0] ipdt_mode_enable;"
+    yield ""
+    yield "  // flattened functional signals / OE enables / pads (slices connect to DUT ports below)"
+    yield "  logic [NFI-1:0]  tb_fi;"
+    yield "  wire  [NFO-1:0]  tb_fo;"
+    yield "  logic [NEN-1:0]  tb_en;"
+    yield "  logic [NPI-1:0]  tb_pi;"
+    yield "  wire  [NPIO-1:0] tb_pio;"
+    yield "  logic [NPIO-1:0] tb_pio_drv, tb_pio_oe;"
+    yield "  for (genvar i = 0; i < NPIO; i++) begin : g_pio"
+    yield "    assign tb_pio[i] = tb_pio_oe[i] ? tb_pio_drv[i] : 1'bz;"
+    yield "  end"
+    if t.osc:
+        yield "  logic XIN;"
+        yield "  wire  XOUT;"
+    yield ""
+    yield "  logic [63:0]    steps [NSTEP];"
+    yield "  logic [NFO-1:0] masks [NMASK];"
+    names = [f'"{n}"' for n in t.tests] or ['""']
+    yield "  localparam string TEST_NAMES [NTEST] = '{"
+    for i, n in enumerate(names):
+        yield f"    {n}{',' if i < len(names) - 1 else ''}"
+    yield "  };"
+    yield ""
+
+    yield "  // DUT"
+    if t.has_io_test:
+        yield "  // Note: pad_mux exposes io_test passthrough ports (io_test_osc_io, io_test_in, io_test_io)"
+        yield "  // These are intentionally left unconnected in this smoke testbench."
+    yield "  pad_mux dut ("
+    conns = [(f".{m}_mode_enable", f"{m}_mode_enable") for m in ("normal", "scan", "ipdt")]
+
+    def sl(vec, lo, W):
+        return f"{vec}[{lo + W - 1}:{lo}]" if W > 1 else f"{vec}[{lo}]"
+
+    sig = {**{b: sl("tb_fi", lo, W) for b, (lo, W) in t.fi.items()}, **{b: sl("tb_fo", lo, W) for b, (lo, W) in t.fo.items()}}
+    for base in sorted(sig):
+        conns.append((f".{sv_id(base)}", sig[base]))
+    for eb, (lo, W) in t.en.items():
+        conns.append((f".{sv_id(eb)}", sl("tb_en", lo, W)))
+    for base, (lo, W, _) in t.pi.items():
+        conns.append((f".{sv_id(base)}", sl("tb_pi", lo, W)))
+    for base, (lo, W, _) in t.pio.items():
+        conns.append((f".{sv_id(base)}", sl("tb_pio", lo, W)))
+    if t.osc:
+        conns.append((".XIN", "XIN"))
+        conns.append((".XOUT", "XOUT"))
+    PW = max(len(p) for p, _ in conns)
+    VW = max(len(v) for _, v in conns)
+    for i, (p, v) in enumerate(conns):
+        comma = "," if i < len(conns) - 1 else ""
+        yield f"    {p.ljust(PW)} ( {v.ljust(VW)} ){comma}"
+    yield "  );"
+    yield ""
+
+    yield "  task automatic disable_all_modes();"
+    yield "    normal_mode_enable = '0;"
+    yield "    scan_mode_enable   = '0;"
+    yield "    ipdt_mode_enable   = '0;"
+    yield "  endtask"
+    yield ""
+
+    yield "  initial begin"
+    yield "    logic [63:0]    s;"
+    yield "    logic [63:0]    obs [NOBS];"
+    yield "    logic [NFO-1:0] snap;"
+    yield "    logic           v, got;"
+    yield "    int             a, b, cur, checks, errs;"
+    yield "    string          steps_file;"
+    yield "    if (!$value$plusargs(\"STEPS=%s\", steps_file)) steps_file = STEPS_FILE;"
+    yield "    $readmemh(steps_file, steps);"
+    yield "    $readmemh(MASKS_FILE, masks);"
+    yield "    disable_all_modes();"
+    yield "    tb_fi = '0; tb_en = '0; tb_pi = '0;"
+    yield "    tb_pio_oe = '0; tb_pio_drv = '0;"
+    yield "    cur = -1; checks = 0; errs = 0;"
+    yield "    #1;"
+    yield "    if ((tb_fo & masks[NMASK-1]) !== '0) $error(\"[TB] default(all disable) | exp=0 got=%h\", tb_fo & masks[NMASK-1]);"
+    yield ""
+    yield "    for (int n = 0; n < NSTEP; n++) begin"
+    yield "      s = steps[n];"
+    yield "      if ($isunknown(s) || s[63:60] == OP_END) break;"
+    yield "      a = s[55:28];"
+    yield "      b = s[27:0];"
+    yield "      case (s[63:60])"
+    yield "        OP_BEGIN: begin"
+    yield "          cur = a >> 2;"
+    yield "          disable_all_modes();"
+    yield "          case (a & 3)"
+    yield "            0: normal_mode_enable[b] = 1'b1;"
+    yield "            1: scan_mode_enable[b]   = 1'b1;"
+    yield "            default: ipdt_mode_enable[b] = 1'b1;"
+    yield "          endcase"
+    yield "          #1;"
+    yield "          snap = tb_fo;"
+    yield "        end"
+    yield "        OP_SET: if (b == 0) tb_fi[a] = s[59]; else tb_en[a] = s[59];"
+    yield "        OP_FUNC, OP_PAD_I, OP_PAD_IO: begin"
+    yield "          // 0 -> 1 -> 0 toggle; every following OP_OBS bit must follow the driven value"
+    yield "          for (int k = 0; k < b; k++) obs[k] = steps[n + 1 + k];"
+    yield "          for (int ph = 0; ph < 3; ph++) begin"
+    yield "            v = (ph == 1);"
+    yield "            case (s[63:60])"
+    yield "              OP_FUNC:  tb_fi[a] = v;"
+    yield "              OP_PAD_I: tb_pi[a] = v;"
+    yield "              default:  begin tb_pio_oe[a] = 1'b1; tb_pio_drv[a] = v; end"
+    yield "            endcase"
+    yield "            #1;"
+    yield "            for (int k = 0; k < b; k++) begin"
+    yield "              got = obs[k][27:0] ? tb_pio[obs[k][55:28]] : tb_fo[obs[k][55:28]];"
+    yield "              checks++;"
+    yield "              if (got !== v) begin"
+    yield "                errs++;"
+    yield "                $error(\"[TB] route | test=%0s step=%0d %0s[%0d] exp=%0b got=%0b\", TEST_NAMES[cur], n, obs[k][27:0] ? \"tb_pio\" : \"tb_fo\", obs[k][55:28], v, got);"
+    yield "              end"
+    yield "            end"
+    yield "          end"
+    yield "          if (s[63:60] == OP_PAD_IO) tb_pio_oe[a] = 1'b0;"
+    yield "          n += b;"
+    yield "        end"
+    yield "        OP_CHECK: begin"
+    yield "          if ((tb_fo & masks[a]) !== (snap & masks[a]))"
+    yield "            $error(\"[TB] stable | test=%0s diff=%h\", TEST_NAMES[a], (tb_fo ^ snap) & masks[a]);"
+    yield "        end"
+    yield "        default: $error(\"[TB] bad step %0d: %h\", n, s);"
+    yield "      endcase"
+    yield "    end"
+    yield ""
+    yield "    #10;"
+    yield "    $display(\"[TB] Full sequence run done | steps=%0s route checks=%0d route errors=%0d\", steps_file, checks, errs);"
+    yield "    $finish;"
+    yield "  end"
+    yield ""
+    yield "endmodule"
+
+
+def tb_shard_manifest(t: TbTable, shards: List[Tuple[str, List[int]]], files: List[str]) -> str:
+    """shard 목록(JSON). 팜에서는 testbench.sv를 한 번 컴파일하고 shard마다 plusarg만 바꿔 실행한다."""
+    ent = []
+    for (name, tests), fn in zip(shards, files):
+        ent.append(
+            {
+                "name": name,
+                "steps": fn,
+                "plusargs": [f"+STEPS={fn}"],
+                "tests": [t.tests[n] for n in tests],
+                "n_steps": sum(t.spans[n][1] - t.spans[n][0] for n in tests),
+            }
+        )
+    return json.dumps({"format": 1, "top": "testbench", "sources": ["testbench.sv"], "masks": "tb_masks.hex", "shards": ent}, indent=1)
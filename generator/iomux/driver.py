@@ -1,34 +1,56 @@
 import os
 import sys
-import zipfile
-from typing import Dict, Optional, Set, Tuple
+from typing import TYPE_CHECKING, Dict, Optional, Sequence, Set, Tuple
 
-from .banner import set_gen_header
+from .banner import TOOL_VERSION, make_gen_header
 from .errors import SpecError
-from .excel import find_header_row, load_grid, parse_sheet
 from .models import ExcelModel
-from .validate import validate
-from .utils import padtype_key, sv_id, is_io_test_name
-from .codegen.gen_mode_mux import gen_mode_mux_sv
-from .codegen.gen_pad_mux import gen_pad_mux_sv
-from .codegen.gen_tb import gen_testbench_sv
+from .output import CODEGEN_REV, OutputWriter, fingerprint
+from .profiling import count, stage
+from .utils import sv_id, is_io_test_name
 
+if TYPE_CHECKING:
+    from .cache import ModelCache
 
-def run_generate(
-    xlsx_path: str,
-    outdir: str,
-    pad_types: Dict[str, str],
-    mux_exclude: Set[str],
-    sheet: Optional[str] = None,
-) -> Tuple[str, int, int]:
+# excel/validate는 캐시 miss, cache(pickle/hashlib)는 캐시 사용 시, codegen은 generate_outputs에서만
+# 필요하므로 함수 안에서 import한다(CLI 기동 시간: --help/캐시 hit/--no-cache 경로가 쓰지 않는 모듈을 로드하지 않음).
+
+
+def _map_ordered(calls, jobs: int):
+    if jobs <= 1:
+        for fn, fargs in calls:
+            yield fn(*fargs)
+        return
+    from concurrent.futures import ProcessPoolExecutor
+
+    with ProcessPoolExecutor(max_workers=jobs) as ex:
+        futs = [ex.submit(fn, *fargs) for fn, fargs in calls]
+        for f in futs:
+            yield f.result()
+
+
+def _render(fn, fargs) -> str:
+    # 워커 프로세스용: 줄 생성기를 문자열로 모아 돌려준다(생성기는 pickle 불가)
+    return "\n".join(fn(*fargs))
+
+
+def open_workbook(xlsx_path: str):
     try:
         import openpyxl
     except Exception:
         print("[U901] openpyxl import failed. Please `pip install openpyxl`.", file=sys.stderr)
         sys.exit(3)
+    from .excel import stream_grid_supported
+
+    # read-only 스트리밍은 openpyxl 내부 파서에 기대므로, 없으면 일반 모드로 연다
+    return openpyxl.load_workbook(xlsx_path, read_only=stream_grid_supported(), data_only=True)
+
+
+def select_sheet(wb, sheet: Optional[str]):
+    from .excel import find_header_row, load_grid, probe_sheet
 
-    wb = openpyxl.load_workbook(xlsx_path, data_only=True)
     ws = None
+    g = None
     last_e: Optional[SpecError] = None
     if sheet:
         if sheet in wb.sheetnames:
@@ -36,58 +58,206 @@ def run_generate(
         else:
             raise SpecError("F101", {"sheet": sheet})
     else:
+        # 워크북 순서대로 시트마다 상단 PROBE_ROWS 행을 탐침하고, 빗나가면 같은 시트의 전체 행을 훑는다.
+        # 세 키워드가 시트 어디에도 없으면 grid를 만들지 않고 다음 시트로(첫 일치 시트에서 멈춤).
         for cand in wb.worksheets:
+            if not (probe_sheet(cand) or probe_sheet(cand, rows=None)):
+                last_e = SpecError("F101")
+                continue
             try:
-                g = load_grid(cand)
-                find_header_row(g)
+                with stage("load_grid"):
+                    g = load_grid(cand)
+                with stage("find_header_row"):
+                    find_header_row(g)
                 ws = cand
                 break
             except SpecError as e:
                 last_e = e
+                g = None
         if ws is None:
             raise last_e or SpecError("F101")
+    return ws, g
+
+
+def build_model(ws, grid, pad_types: Dict[str, str], mux_exclude: Set[str], all_errors: bool = False) -> ExcelModel:
+    from .excel import parse_sheet
+    from .validate import validate
+
+    with stage("parse_sheet"):
+        model: ExcelModel = parse_sheet(ws, pad_types, mux_exclude, grid=grid)
+    with stage("validate"):
+        validate(model, all_errors=all_errors)
+    return model
+
+
+def load_model(
+    xlsx_path: str,
+    pad_types: Dict[str, str],
+    mux_exclude: Set[str],
+    sheet: Optional[str] = None,
+    cache: Optional["ModelCache"] = None,
+    all_errors: bool = False,
+) -> Tuple[str, ExcelModel]:
+    key = None
+    if cache is not None:
+        from .cache import cache_key, file_digest
+
+        with stage("cache_lookup"):
+            key = cache_key(file_digest(xlsx_path), sheet, pad_types, mux_exclude)
+            hit = cache.get(key)
+        if hit is not None:
+            count("cache_hit")
+            return hit
+    with stage("workbook_load"):
+        wb = open_workbook(xlsx_path)
+    try:
+        with stage("select_sheet"):
+            ws, g = select_sheet(wb, sheet)
+        model = build_model(ws, g, pad_types, mux_exclude, all_errors)
+        sheet_title = ws.title
+    finally:
+        wb.close()
+    if cache is not None:
+        with stage("cache_store"):
+            cache.put(key, sheet_title, model)
+    return sheet_title, model
+
+
+def run_generate(
+    xlsx_path: str,
+    outdir: str,
+    pad_types: Dict[str, str],
+    mux_exclude: Set[str],
+    sheet: Optional[str] = None,
+    cache: Optional["ModelCache"] = None,
+    out: Optional[OutputWriter] = None,
+    jobs: int = 1,
+    mux_style: str = "unrolled",
+    all_errors: bool = False,
+    om_report: Sequence[str] = (),
+    tb_style: str = "unrolled",
+    tb_shards: Optional[str] = None,
+) -> Tuple[str, int, int]:
+    sheet_title, model = load_model(xlsx_path, pad_types, mux_exclude, sheet=sheet, cache=cache, all_errors=all_errors)
+    NI, NO = generate_outputs(model, sheet_title, xlsx_path, outdir, out=out, jobs=jobs, mux_style=mux_style, om_report=om_report, tb_style=tb_style, tb_shards=tb_shards)
+    return sheet_title, NI, NO
+
 
-    model: ExcelModel = parse_sheet(ws, pad_types, mux_exclude)
-    validate(model)
+def generate_outputs(
+    model: ExcelModel,
+    sheet_title: str,
+    xlsx_path: str,
+    outdir: str,
+    out: Optional[OutputWriter] = None,
+    jobs: int = 1,
+    mux_style: str = "unrolled",
+    om_report: Sequence[str] = (),
+    tb_style: str = "unrolled",
+    tb_shards: Optional[str] = None,
+) -> Tuple[int, int]:
+    from .codegen.common import build_signal_index
+    from .codegen.gen_mode_mux import iter_mode_mux_sv
+    from .codegen.gen_pad_mux import iter_pad_mux_sv
+    from .codegen.gen_submode import iter_submode_sv
+    from .codegen.gen_tb import iter_testbench_sv
 
-    set_gen_header({
+    meta = {
         "input": os.path.basename(xlsx_path),
-        "sheet": ws.title,
+        "sheet": sheet_title,
         "NI": str(len(model.pads_I)),
         "NO": str(len(model.pads_IO)),
-    })
+    }
+    header = make_gen_header(meta)
 
+    if out is None:
+        out = OutputWriter(outdir)
     os.makedirs(outdir, exist_ok=True)
-    design_dir = os.path.join(outdir, "design")
-    verif_dir = os.path.join(outdir, "verification")
-    os.makedirs(design_dir, exist_ok=True)
-    os.makedirs(verif_dir, exist_ok=True)
 
     NI = len(model.pads_I)
     NO = len(model.pads_IO)
-    mode_maps = {}
+    # mode_mux/submode 생성은 모델의 순수 함수이므로 jobs>1이면 프로세스 풀에서 병렬 실행.
+    # 결과는 제출 순서대로 쓰므로 출력은 직렬 경로와 동일.
+    with stage("signal_index"):
+        index = build_signal_index(model.modes)
+    calls = []
     for mode in ("normal", "scan", "ipdt"):
-        mdir = os.path.join(design_dir, mode)
-        os.makedirs(mdir, exist_ok=True)
-        text_mux, sig_w_map, sig_dir_map, en_w_map = gen_mode_mux_sv(mode, NI, NO, model.modes[mode])
-        with open(os.path.join(mdir, f"{mode}_mux.sv"), "w", encoding="utf-8") as f:
-            f.write(text_mux)
-        mode_maps[mode] = (sig_w_map, sig_dir_map, en_w_map)
+        calls.append((f"design/{mode}/{mode}_mux.sv", None, "gen_mode_mux_sv", iter_mode_mux_sv, (mode, NI, NO, model.modes[mode], header, index.modes[mode], mux_style)))
         for sm in model.modes[mode]:
             if is_io_test_name(sm.name):
                 continue
-            from .codegen.gen_submode import gen_submode_sv
+            rel = f"design/{mode}/{sv_id(sm.name)}.sv"
+            fp = fingerprint(TOOL_VERSION, CODEGEN_REV, meta, NI, NO, sm)
+            if out.fresh(rel, fp):
+                continue
+            calls.append((rel, fp, "gen_submode_sv", iter_submode_sv, (NI, NO, sm, header, index.subs[(sm.mode, sm.name)])))
 
-            text_sm = gen_submode_sv(NI, NO, sm)
-            with open(os.path.join(mdir, f"{sv_id(sm.name)}.sv"), "w", encoding="utf-8") as f:
-                f.write(text_sm)
+    count("pads_I", NI)
+    count("pads_IO", NO)
+    count("submodes", sum(len(subs) for subs in model.modes.values()))
+    count("cells", sum(len(sm.cells) for subs in model.modes.values() for sm in subs))
 
-    text_top = gen_pad_mux_sv(model, mode_maps)
-    with open(os.path.join(design_dir, "pad_mux.sv"), "w", encoding="utf-8") as f:
-        f.write(text_top)
+    def emit(rel, res, fp=None):
+        count("files")
+        if isinstance(res, str):
+            n_lines, n_bytes = res.count("\n") + 1, len(res.encode("utf-8"))
+            with stage("write"):
+                out.write(rel, res, fp)
+        else:
+            # 줄 생성기를 파일로 바로 흘려 쓴다(파일 전체 문자열을 만들지 않음)
+            n_lines, n_bytes = out.write_lines(rel, res, fp)
+        count("lines", n_lines)
+        count("bytes", n_bytes)
+
+    # 직렬이면 생성과 쓰기가 겹치므로 gen_* 단계에 쓰기 시간이 포함된다.
+    # jobs>1이면 gen_* 단계 시간은 워커 결과를 기다린 시간.
+    if jobs > 1:
+        work = [(_render, (fn, fargs)) for _, _, _, fn, fargs in calls]
+    else:
+        work = [(fn, fargs) for _, _, _, fn, fargs in calls]
+    results = _map_ordered(work, jobs)
+    for rel, fp, name, _, _ in calls:
+        with stage(name):
+            res = next(results)
+            if jobs <= 1:
+                emit(rel, res, fp)
+        if jobs > 1:
+            emit(rel, res, fp)
 
-    tb_text = gen_testbench_sv(model, mode_maps)
-    with open(os.path.join(verif_dir, "testbench.sv"), "w", encoding="utf-8") as f:
-        f.write(tb_text)
-    return ws.title, NI, NO
+    mode_maps = index.mode_maps()
+    ev = None
+    if tb_style == "table" or om_report:
+        # table TB 기대값과 OM 리포트가 같은 평가기 하나를 공유(평가기는 NumPy 필요)
+        from .mux_eval import MuxEvaluator
+
+        with stage("mux_eval"):
+            ev = MuxEvaluator(model, index)
+    with stage("gen_pad_mux_sv"):
+        emit("design/pad_mux.sv", iter_pad_mux_sv(model, mode_maps, header, index.glob))
+    with stage("gen_testbench_sv"):
+        if tb_style == "table":
+            from .codegen import gen_tb_table as tbg
+
+            tbt = tbg.build_tb_table(model, index.glob, ev)
+            # shard마다 스텝 파일 하나, TB/마스크는 공유(시뮬레이터는 한 번 컴파일, +STEPS=로 shard 선택)
+            shards = tbg.shard_tests(tbt, tb_shards)
+            steps = [tbg.shard_steps(tbt, tests) for _, tests in shards]
+            files = [f"tb_steps_{name}.hex" for name, _ in shards] if tb_shards else ["tb_steps.hex"]
+            emit("verification/testbench.sv", tbg.iter_testbench_table_sv(tbt, max(len(st) for st in steps)))
+            for fn, st in zip(files, steps):
+                emit(f"verification/{fn}", tbg.iter_tb_steps_hex(st))
+            emit("verification/tb_masks.hex", tbg.iter_tb_masks_hex(tbt))
+            if tb_shards:
+                emit("verification/tb_shards.json", tbg.tb_shard_manifest(tbt, shards, files))
+        else:
+            emit("verification/testbench.sv", iter_testbench_sv(model, mode_maps, index.glob))
+    if om_report:
+        # 요청한 경우에만: OM 0..63 라우팅 표
+        from .om_report import om_sweep, om_sweep_csv, om_sweep_json
 
+        with stage("om_report"):
+            rows = om_sweep(model, ev)
+            for fmt in sorted(set(om_report)):
+                emit(f"verification/om_sweep.{fmt}", om_sweep_csv(rows) if fmt == "csv" else om_sweep_json(rows))
+    with stage("write"):
+        out.finish()
+    return NI, NO
@@ -1,4 +1,4 @@
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional
 
 EID = {
     "F101":"Excel merge/markers not found (Pin Group/Pin Name/PAD type rows missing)",
@@ -19,6 +19,7 @@ EID = {
     "U901":"Unexpected error",
     "U902":"Mixed directions for same signal base",
     "U903":"Inconsistent bus width across submodes for same signal",
+    "U904":"Invalid batch manifest",
     "B101":"Bus indices are not contiguous (must be 0..W-1)",
     "B102":"Mixed scalar and indexed forms for the same base signal",
     "B103":"Duplicate index for the same base within a single submode",
@@ -35,3 +36,13 @@ class SpecError(Exception):
         c = " ".join(f"{k}={v}" for k, v in self.ctx.items())
         return f"[{self.eid}] {EID.get(self.eid, self.eid)}" + (f" | {c}" if c else "")
 
+
+
+class SpecErrors(SpecError):
+    # --all-errors: 위반 여러 개를 한 번에 보고. eid/ctx는 첫 오류와 같다.
+    def __init__(self, errors: List[SpecError]):
+        super().__init__(errors[0].eid, errors[0].ctx)
+        self.errors = list(errors)
+
+    def pretty(self) -> str:
+        return "\n".join(e.pretty() for e in self.errors)
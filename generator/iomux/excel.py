@@ -1,8 +1,11 @@
 import re
+from functools import lru_cache
+from sys import intern
 from typing import Any, Dict, List, Optional, Set, Tuple
 
 from .errors import SpecError
 from .models import ExcelModel, PadRow, SigCell, SubMode
+from .profiling import stage
 from .utils import (
     classify_mode,
     nlow,
@@ -17,10 +20,76 @@ KW_PG = "Pin Group"
 KW_PN = "Pin Name"
 KW_PT = "PAD type"
 FORBIDDEN_BASES = {"OM", "PORN", "XIN", "XOUT"}
+PROBE_ROWS = 64
 NT_IN_RE = re.compile(r"(?i)(?:nt|nand(?:_tree)?)_in\[(\d+)\]")
+SIG_RE = re.compile(r"^(?P<base>[A-Za-z_]\w*)(?:\[(?P<idx>\d+)\])?$")
+OM_PREFIX_RE = re.compile(r"(?i)\bom\s*=\s*")
+OM_PART_RE = re.compile(r"[^,]+")
+OM_SIZED_H_RE = re.compile(r"(?i)\b\d+\s*'\s*h\s*([0-9a-f]+)\b")
+OM_SIZED_D_RE = re.compile(r"(?i)\b\d+\s*'\s*d\s*([0-9]+)\b")
+OM_HEX_RE = re.compile(r"[0-9A-Fa-f]+")
+OM_HEX_ALPHA_RE = re.compile(r"[A-Fa-f]")
+
+
+def stream_grid_supported() -> bool:
+    # load_grid_stream은 openpyxl read-only 내부(WorkSheetParser, ReadOnlyWorksheet._get_source)로
+    # 셀과 <mergeCell>을 한 번에 읽는다. 없으면 호출자가 워크북을 일반 모드로 연다(merged_cells 경로).
+    try:
+        from openpyxl.worksheet._read_only import ReadOnlyWorksheet
+        from openpyxl.worksheet._reader import WorkSheetParser  # noqa: F401
+    except ImportError:
+        return False
+    return hasattr(ReadOnlyWorksheet, "_get_source")
+
+
+def load_grid_stream(ws):
+    # read-only 시트 XML을 한 번만 파싱: 행 값은 iter_rows(values_only=True)와 같게 모으고,
+    # 같은 파서가 시트 끝에서 읽어 둔 mergeCells로 머지 영역을 좌상단 값으로 채운다.
+    from openpyxl.utils.cell import range_boundaries
+    from openpyxl.worksheet._reader import WorkSheetParser
+
+    wb = ws.parent
+    rows: List[List[Any]] = []
+    R, C = 1, 1
+    with ws._get_source() as src:
+        parser = WorkSheetParser(
+            src,
+            ws._shared_strings,
+            data_only=wb.data_only,
+            epoch=wb.epoch,
+            date_formats=wb._date_formats,
+            timedelta_formats=wb._timedelta_formats,
+        )
+        for r, cells in parser.parse():
+            if r <= len(rows):
+                continue
+            rows += [[] for _ in range(len(rows) + 1, r)]
+            vals: List[Any] = [None] * (cells[-1]["column"] if cells else 0)
+            for cell in cells:
+                vals[cell["column"] - 1] = cell["value"]
+            if vals:
+                R = r
+                C = max(C, len(vals))
+            rows.append(vals)
+        merged = parser.merged_cells.mergeCell if parser.merged_cells else []
+    merges: List[Tuple[int, int, int, int]] = []
+    for mc in merged:
+        c0, r0, c1, r1 = range_boundaries(mc.ref)
+        merges.append((r0, c0, r1, c1))
+        R = max(R, r1)
+        C = max(C, c1)
+    g = [vals + [None] * (C - len(vals)) for vals in rows[:R]]
+    g += [[None] * C for _ in range(R - len(g))]
+    fills = [(rng, g[rng[0] - 1][rng[1] - 1]) for rng in merges]
+    for (r0, c0, r1, c1), v in fills:
+        for r in range(r0, r1 + 1):
+            g[r - 1][c0 - 1 : c1] = [v] * (c1 - c0 + 1)
+    return g
 
 
 def load_grid(ws):
+    if not hasattr(ws, "merged_cells"):
+        return load_grid_stream(ws)
     R, C = ws.max_row, ws.max_column
     g = [[ws.cell(r, c).value for c in range(1, C + 1)] for r in range(1, R + 1)]
     for rng in ws.merged_cells.ranges:
@@ -32,6 +101,21 @@ def load_grid(ws):
     return g
 
 
+def probe_sheet(ws, rows: Optional[int] = PROBE_ROWS) -> bool:
+    # 상단 rows행(None이면 전체)에 세 헤더 키워드가 모두 있는지. 병합 채움 값은 좌상단 셀 값의 복사라
+    # 전체 행에서 빗나가면 find_header_row도 반드시 F101이다.
+    want = {nlow(KW_PG), nlow(KW_PN), nlow(KW_PT)}
+    found: Set[str] = set()
+    for vals in ws.iter_rows(min_row=1, max_row=rows, values_only=True):
+        for v in vals:
+            nv = nlow(v)
+            if nv in want:
+                found.add(nv)
+        if found == want:
+            return True
+    return False
+
+
 def find_header_row(grid) -> Tuple[int, Dict[str, int]]:
     want = [nlow(KW_PG), nlow(KW_PN), nlow(KW_PT)]
     for r, row in enumerate(grid):
@@ -67,35 +151,39 @@ def data_start_row(grid, r_hdr, cmap):
     return r
 
 
-def parse_om_values(s: Any) -> List[int]:
-    out: List[int] = []
-    text = norm(s)
-    if not text:
-        return out
-    text = re.sub(r"(?i)\bom\s*=\s*", "", text)
-    parts = [p.strip() for p in text.split(",") if p.strip()]
-
-    def nl(t: str) -> str:
-        t = t.strip()
-        t = re.sub(r"(?i)\b\d+\s*'\s*h\s*([0-9a-f]+)\b", r"0x\1", t)
-        t = re.sub(r"(?i)\b\d+\s*'\s*d\s*([0-9]+)\b", r"\1", t)
-        if re.fullmatch(r"[0-9A-Fa-f]+", t) and re.search(r"[A-Fa-f]", t):
+def _om_int(t: str) -> int:
+    t = t.strip()
+    if not t.isdigit():
+        t = OM_SIZED_H_RE.sub(r"0x\1", t)
+        t = OM_SIZED_D_RE.sub(r"\1", t)
+        if OM_HEX_RE.fullmatch(t) and OM_HEX_ALPHA_RE.search(t):
             t = "0x" + t
-        return t
+    return int(t, 0)
+
 
-    def one(tok: str):
+@lru_cache(maxsize=4096, typed=True)
+def _parse_om_cached(s: Any) -> Tuple[int, ...]:
+    # 같은 OM 셀 텍스트가 coalesce_mode_row/detect_spans와 여러 열에서 반복되므로 원문 기준 캐시
+    text = norm(s)
+    if not text:
+        return ()
+    text = OM_PREFIX_RE.sub("", text)
+    out: Dict[int, None] = {}
+    for m in OM_PART_RE.finditer(text):
+        tok = m.group().strip()
+        if not tok:
+            continue
         if "~" in tok:
-            a, b = [nl(x) for x in tok.split("~", 1)]
-            va, vb = int(a, 0), int(b, 0)
-            lo, hi = min(va, vb), max(va, vb)
-            return list(range(lo, hi + 1))
-        return [int(nl(tok), 0)]
+            a, b = tok.split("~", 1)
+            va, vb = _om_int(a), _om_int(b)
+            out.update(dict.fromkeys(range(min(va, vb), max(va, vb) + 1)))
+        else:
+            out[_om_int(tok)] = None
+    return tuple(out)
 
-    for p in parts:
-        out += one(p)
-    uniq: List[int] = []
-    [uniq.append(v) for v in out if v not in uniq]
-    return uniq
+
+def parse_om_values(s: Any) -> List[int]:
+    return list(_parse_om_cached(s))
 
 
 def infer_mode_from_oms(oms: List[int]) -> Optional[str]:
@@ -186,9 +274,14 @@ def detect_spans(mode_row, sub_row, om_row):
     return spans
 
 
-def parse_sheet(ws, pad_types: Dict[str, str], mux_exclude: Set[str]) -> ExcelModel:
-    g = load_grid(ws)
-    r_hdr, cmap = find_header_row(g)
+def parse_sheet(ws, pad_types: Dict[str, str], mux_exclude: Set[str], grid=None) -> ExcelModel:
+    if grid is not None:
+        g = grid
+    else:
+        with stage("load_grid"):
+            g = load_grid(ws)
+    with stage("find_header_row"):
+        r_hdr, cmap = find_header_row(g)
     cg, cn, ct = cmap["Pin Group"], cmap["Pin Name"], cmap["PAD type"]
 
     r_mode = None
@@ -203,7 +296,8 @@ def parse_sheet(ws, pad_types: Dict[str, str], mux_exclude: Set[str]) -> ExcelMo
     mode_row = g[r_mode]
     sub_row = g[r_sub]
     om_row = g[r_om]
-    spans = detect_spans(mode_row, sub_row, om_row)
+    with stage("detect_spans"):
+        spans = detect_spans(mode_row, sub_row, om_row)
 
     pads_I: List[PadRow] = []
     pads_IO: List[PadRow] = []
@@ -242,12 +336,12 @@ def parse_sheet(ws, pad_types: Dict[str, str], mux_exclude: Set[str]) -> ExcelMo
         group_val = norm(row[cg] if cg < len(row) else "")
 
         if pdir == "I":
-            pr = PadRow(r, group_val, pin, ptype_text, "I", excluded, (-1 if excluded else ixI))
+            pr = PadRow(r, intern(group_val), intern(pin), intern(ptype_text), "I", excluded, (-1 if excluded else ixI))
             if not excluded:
                 pads_I.append(pr)
                 ixI += 1
         else:
-            pr = PadRow(r, group_val, pin, ptype_text, "IO", excluded, (-1 if excluded else ixO))
+            pr = PadRow(r, intern(group_val), intern(pin), intern(ptype_text), "IO", excluded, (-1 if excluded else ixO))
             if not excluded:
                 pads_IO.append(pr)
                 ixO += 1
@@ -255,10 +349,20 @@ def parse_sheet(ws, pad_types: Dict[str, str], mux_exclude: Set[str]) -> ExcelMo
     pin2pad = {p.name: p for p in pads_I + pads_IO}
     modes: Dict[str, List[SubMode]] = {"normal": [], "scan": [], "ipdt": []}
     bit_idx = {"normal": 0, "scan": 0, "ipdt": 0}
+    sm_of: Dict[Tuple[str, str], SubMode] = {}
     for (m, name), (c0, c1, omv) in sorted(spans.items(), key=lambda kv: kv[1][0]):
-        sm = SubMode(m, name, omv, [], bit_idx[m])
+        sm = SubMode(intern(m), intern(name), omv, [], bit_idx[m])
         bit_idx[m] += 1
         modes[m].append(sm)
+        sm_of[(m, name)] = sm
+
+    # 블록 색인: 열 → 블록 번호(spans 순서 = 오류 보고 순서). 행마다 채워진 열만 한 번 훑어 블록을 고른다.
+    blocks = [(sm_of[key], key[1], c0, c1) for key, (c0, c1, _) in spans.items()]
+    ncol = max((c1 for (_, _, _, c1) in blocks), default=-1) + 1
+    col_blk = [-1] * ncol
+    for bi, (_, _, c0, c1) in enumerate(blocks):
+        for c in range(c0, c1 + 1):
+            col_blk[c] = bi
 
     for r in range(r_data, len(g)):
         row = g[r]
@@ -268,14 +372,8 @@ def parse_sheet(ws, pad_types: Dict[str, str], mux_exclude: Set[str]) -> ExcelMo
         pin = norm(pin_raw)
         base_pin = strip_idx(pin)
 
-        any_payload = False
-        for (_m, _n), (c0, c1, _) in spans.items():
-            for c in range(c0, c1 + 1):
-                if c < len(row) and row[c] not in (None, ""):
-                    any_payload = True
-                    break
-            if any_payload:
-                break
+        touched = sorted({col_blk[c] for c, v in enumerate(row[:ncol]) if v is not None and v != "" and col_blk[c] >= 0})
+        any_payload = bool(touched)
 
         if any_payload and ((pin in mux_exclude) or (base_pin in ex_bases)):
             raise SpecError("S701", {"pin": pin, "row": r + 1})
@@ -288,7 +386,8 @@ def parse_sheet(ws, pad_types: Dict[str, str], mux_exclude: Set[str]) -> ExcelMo
         if pr is None:
             continue
 
-        for (m, name), (c0, c1, _) in spans.items():
+        for bi in touched:
+            sm, name, c0, c1 = blocks[bi]
             width = c1 - c0 + 1
             if width < 4:
                 has_any = any((cc < len(row) and norm(row[cc]) != "") for cc in range(c0, c1 + 1))
@@ -300,11 +399,7 @@ def parse_sheet(ws, pad_types: Dict[str, str], mux_exclude: Set[str]) -> ExcelMo
             ctrl_c0 = c1 - 2
             scname = norm(row[c0] if c0 < len(row) else "")
             if scname == "":
-                any_payload = any((c < len(row) and row[c] not in (None, "")) for c in range(c0, c1 + 1))
-                if any_payload:
-                    continue
-                else:
-                    continue
+                continue
 
             v_marker = norm(row[ctrl_c0] if ctrl_c0 < len(row) else "")
             v_dir = norm(row[ctrl_c0 + 1] if ctrl_c0 + 1 < len(row) else "")
@@ -367,13 +462,13 @@ def parse_sheet(ws, pad_types: Dict[str, str], mux_exclude: Set[str]) -> ExcelMo
                 left, right = [x.strip() for x in scname.split("/", 1)]
                 raw_base, raw_en = left, right
 
-            m2 = re.match(r"^(?P<base>[A-Za-z_]\w*)(?:\[(?P<idx>\d+)\])?$", raw_base)
+            m2 = SIG_RE.match(raw_base)
             base_name = m2.group("base") if m2 else raw_base
             base_idx = int(m2.group("idx")) if (m2 and m2.group("idx")) else None
 
             en_idx = None
             if raw_en:
-                m3 = re.match(r"^(?P<base>[A-Za-z_]\w*)(?:\[(?P<idx>\d+)\])?$", raw_en)
+                m3 = SIG_RE.match(raw_en)
                 en_idx = int(m3.group("idx")) if (m3 and m3.group("idx")) else None
 
             nt_ord = None
@@ -388,23 +483,20 @@ def parse_sheet(ws, pad_types: Dict[str, str], mux_exclude: Set[str]) -> ExcelMo
                 raise SpecError("P202", {"pin": pin, "row": r + 1, "submode": name})
 
             cell = SigCell(
-                base_name,
+                intern(base_name),
                 base_idx,
-                raw_en,
+                intern(raw_en) if raw_en else raw_en,
                 en_idx,
-                marker,
-                direction or "",
-                dflt,
+                intern(marker),
+                intern(direction or ""),
+                intern(dflt),
                 pr.kind,
                 pr.index,
-                pin,
+                pr.name,
                 pr.row,
                 nt_ord,
             )
-            for sm in modes[m]:
-                if sm.name == name:
-                    sm.cells.append(cell)
-                    break
+            sm.cells.append(cell)
 
     return ExcelModel(pads_I, pads_IO, pads_OSC, modes)
 
@@ -1,8 +1,12 @@
+import sys
 from dataclasses import dataclass, field
 from typing import Any, Dict, List, Optional
 
+# 모델 객체는 셀 수만큼 만들어지므로 가능하면 __slots__ 사용(3.10+). 문자열 필드는 파서에서 sys.intern.
+_SLOTS = {"slots": True} if sys.version_info >= (3, 10) else {}
 
-@dataclass
+
+@dataclass(**_SLOTS)
 class PadRow:
     row: int
     group: str
@@ -13,7 +17,7 @@ class PadRow:
     index: int = -1
 
 
-@dataclass
+@dataclass(**_SLOTS)
 class SigCell:
     base: str
     base_idx: Optional[int]
@@ -29,7 +33,7 @@ class SigCell:
     nt_order: Optional[int] = None
 
 
-@dataclass
+@dataclass(**_SLOTS)
 class SubMode:
     mode: str
     name: str
@@ -38,7 +42,7 @@ class SubMode:
     index: int = -1
 
 
-@dataclass
+@dataclass(**_SLOTS)
 class ExcelModel:
     pads_I: List[PadRow]
     pads_IO: List[PadRow]
@@ -0,0 +1,234 @@
+"""In-process evaluator for the generated pad_mux.
+
+시뮬레이터 없이 ExcelModel과 mode enable 벡터로 PAD 필드(OEN/I/DS/PE/PS/ST/IE)와
+기능 출력 신호의 값을 계산한다. 값은 SV 식 문자열(상수 `TI_*`/`TO_*`, 기능 입력
+`TDO[0]`, enable `~TDO_oe`, PAD 핀 `TDI` 등)로 나타내며 `'0`은 OR 결과 0, `X`는
+구동되지 않았거나 여러 드라이버가 충돌한 값이다.
+
+enable 벡터는 64비트(normal 0..31, scan 32..47, ipdt 48..63) NumPy bool 배열로
+여러 개를 한 번에 평가한다.
+"""
+
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from .codegen.common import (
+    IN_FIELDS,
+    IO_FIELDS,
+    SignalIndex,
+    build_signal_index,
+    iter_nand_in_drives,
+    iter_nand_out_drives,
+    iter_submode_drives,
+    nand_out_cells,
+)
+from .models import ExcelModel, SubMode
+from .utils import is_io_test_name, sv_id
+
+MODES = ("normal", "scan", "ipdt")
+ENABLE_BASE = {"normal": 0, "scan": 32, "ipdt": 48}
+ENABLE_BITS = 64
+ZERO = "'0"
+X = "X"
+NAND_OUT = "nand_tree"
+
+
+def submode_drives(sm: SubMode) -> Iterator[Tuple[str, int, str, str]]:
+    """서브모드가 test_in/test_io에 거는 할당 (kind, pad, field, expr) — gen_submode와 같은 표(codegen.common)에서 만든다."""
+    kind = {"in": "I", "io": "IO"}
+    if sm.name.strip().lower() == "nand_tree":
+        for c, tgt, fld, val in iter_nand_in_drives(sm):
+            yield kind[tgt], c.pad_index, fld, val
+        for c in nand_out_cells(sm):
+            for fld, val in iter_nand_out_drives(c, NAND_OUT):
+                yield "IO", c.pad_index, fld, val
+        return
+    for c, tgt, fld, val in iter_submode_drives(sm):
+        if tgt in kind:
+            yield kind[tgt], c.pad_index, fld, val
+
+
+class MuxEval:
+    """평가 결과: 벡터마다 PAD 필드/기능 출력의 소스 id(`sources` 인덱스)."""
+
+    def __init__(self, ev: "MuxEvaluator", pad, func):
+        self.ev = ev
+        self.pad = pad  # (N, len(ev.pad_outputs)) int32
+        self.func = func  # (N, len(ev.func_outputs)) int32
+
+    def __len__(self) -> int:
+        return self.pad.shape[0]
+
+    def pad_value(self, n: int, kind: str, pad: int, field: str) -> str:
+        return self.ev.sources[self.pad[n, self.ev.pad_pos[(kind, pad, field)]]]
+
+    def func_value(self, n: int, name: str) -> str:
+        return self.ev.sources[self.func[n, self.ev.func_pos[name]]]
+
+    def row(self, n: int) -> Dict[str, Dict]:
+        src = self.ev.sources
+        return {
+            "pads": {o: src[v] for o, v in zip(self.ev.pad_outputs, self.pad[n].tolist())},
+            "func": {o: src[v] for o, v in zip(self.ev.func_outputs, self.func[n].tolist())},
+        }
+
+
+class MuxEvaluator:
+    # 표 구성(모델당 1회):
+    #  - PAD 필드: 출력 o × enable 비트 b → b가 켜졌을 때 그 서브모드가 내는 값(mode_mux OR 항).
+    #    pad_mux는 test_on(|scan|ipdt)으로 모드 하나를 고르므로 선택된 모드의 비트만 본다.
+    #  - 기능 출력(서브모드 출력 포트, I 방향 셀): 같은 표 형태, 모드 구분 없이 OR(모드 간 같은 base도 OR로 본다).
+    #  - GPIO-like `<B>_c[pad]`: OR 없이 서브모드가 직접 구동(en ? PAD : default). 드라이버가 여럿이면 해석값이 다르면 X.
+    def __init__(self, model: ExcelModel, index: Optional[SignalIndex] = None):
+        import numpy as np
+
+        self.np = np
+        self.model = model
+        if index is None:
+            index = build_signal_index(model.modes)
+        self.sources: List[str] = [ZERO, X]
+        self._src_id: Dict[str, int] = {ZERO: 0, X: 1}
+        NI, NO = len(model.pads_I), len(model.pads_IO)
+        self.pad_outputs: List[Tuple[str, int, str]] = [("I", p, f) for p in range(NI) for f in IN_FIELDS] + [("IO", p, f) for p in range(NO) for f in IO_FIELDS]
+        self.pad_pos = {o: k for k, o in enumerate(self.pad_outputs)}
+        self.multi_driven: List[Tuple[str, str, str, int, str, Tuple[str, ...]]] = []
+        self.om_bits: Dict[int, List[int]] = {}
+
+        pad_tab = np.zeros((len(self.pad_outputs), ENABLE_BITS), dtype=np.int32)
+        glob = index.glob
+        func_names: List[str] = []
+        func_key: Dict[Tuple[str, int], int] = {}
+        for base in sorted(glob.sig_w):
+            if glob.sig_dir[base] != "output":
+                continue
+            W = glob.sig_w[base]
+            for i in range(W):
+                func_key[(base, i)] = len(func_names)
+                func_names.append(f"{sv_id(base)}[{i}]" if W > 1 else sv_id(base))
+        func_tab = np.zeros((len(func_names), ENABLE_BITS), dtype=np.int32)
+        direct: Dict[str, List[Tuple[int, int, int]]] = {}
+
+        for mode in MODES:
+            for k, sm in enumerate(model.modes[mode]):
+                bit = ENABLE_BASE[mode] + k
+                for om in sm.om_values:
+                    self.om_bits.setdefault(om, []).append(bit)
+                if is_io_test_name(sm.name):
+                    # io_test는 인스턴스 없이 io_test_* 포트가 그대로 OR 항이 된다
+                    for o, (kind, p, fld) in enumerate(self.pad_outputs):
+                        pad_tab[o, bit] = self._sid(f"io_test_{'in' if kind == 'I' else 'io'}[{p}].{fld}")
+                    continue
+                pad_tab[:, bit] = 1
+                drv: Dict[Tuple[str, int, str], List[str]] = {}
+                for kind, p, fld, val in submode_drives(sm):
+                    drv.setdefault((kind, p, fld), []).append(val)
+                for key, vals in drv.items():
+                    if len(set(vals)) > 1:
+                        self.multi_driven.append((mode, sm.name, key[0], key[1], key[2], tuple(vals)))
+                        v = X
+                    else:
+                        v = vals[0]
+                    pad_tab[self.pad_pos[key], bit] = self._sid(v)
+
+                # 기능 출력: 포트 폭 안의 비트는 기본 X(미구동), `assign <sig> = test_en ? PAD.C : ..`가 있으면 PAD 핀
+                maps = index.subs[(sm.mode, sm.name)]
+                for base, w in maps.sig_w.items():
+                    if maps.sig_dir[base] == "output":
+                        for i in range(w):
+                            func_tab[func_key[(base, i)], bit] = 1
+                if sm.name.strip().lower() == "nand_tree":
+                    continue
+                for c, tgt, _, _ in iter_submode_drives(sm):
+                    if tgt == "gpio_c":
+                        name = f"{sv_id(c.base)}_c[{c.pad_index}]"
+                        direct.setdefault(name, []).append((bit, self._sid(sv_id(c.pin_name)), self._sid(c.default_in)))
+                    elif tgt == "sig" and c.direction == "I":
+                        func_tab[func_key[(c.base, c.base_idx or 0)], bit] = self._sid(sv_id(c.pin_name))
+
+        self.direct_outputs = sorted(direct)
+        self._direct = [direct[n] for n in self.direct_outputs]
+        self.func_outputs: List[str] = func_names + self.direct_outputs
+        self.func_pos = {o: k for k, o in enumerate(self.func_outputs)}
+        self.pad_tab = pad_tab
+        self.func_tab = func_tab
+        mode_mask = np.zeros((len(MODES), ENABLE_BITS), dtype=bool)
+        for m, mode in enumerate(MODES):
+            lo = ENABLE_BASE[mode]
+            mode_mask[m, lo:lo + (32 if mode == "normal" else 16)] = True
+        self.mode_mask = mode_mask
+
+    def _sid(self, s: str) -> int:
+        i = self._src_id.get(s)
+        if i is None:
+            i = self._src_id[s] = len(self.sources)
+            self.sources.append(s)
+        return i
+
+    # ---- enable 벡터 ----
+    def enables(self, normal: Sequence[int], scan: Sequence[int], ipdt: Sequence[int]):
+        """정수 enable 값(모드별) → (N, 64) bool 배열."""
+        np = self.np
+        out = []
+        for vals, n in ((normal, 32), (scan, 16), (ipdt, 16)):
+            v = np.asarray(vals, dtype=np.uint64).reshape(-1, 1)
+            out.append(((v >> np.arange(n, dtype=np.uint64)) & np.uint64(1)).astype(bool))
+        return np.concatenate(out, axis=1)
+
+    def enables_for_oms(self, oms: Iterable[int]):
+        """OM 값마다 그 OM을 가진 서브모드의 enable 비트만 켠 (N, 64) bool 배열."""
+        np = self.np
+        oms = list(oms)
+        E = np.zeros((len(oms), ENABLE_BITS), dtype=bool)
+        for n, om in enumerate(oms):
+            E[n, self.om_bits.get(om, [])] = True
+        return E
+
+    # ---- 평가 ----
+    def evaluate(self, E) -> MuxEval:
+        np = self.np
+        E = np.asarray(E, dtype=bool).reshape(-1, ENABLE_BITS)
+        scan_on = E[:, 32:48].any(axis=1)
+        ipdt_on = E[:, 48:64].any(axis=1)
+        sel = np.where(scan_on, 1, np.where(ipdt_on, 2, 0))
+        pad = self._or_select(self.pad_tab, E & self.mode_mask[sel])
+        func = self._or_select(self.func_tab, E)
+        if self._direct:
+            func = np.concatenate([func, self._direct_eval(E)], axis=1)
+        return MuxEval(self, pad, func)
+
+    def evaluate_oms(self, oms: Iterable[int]) -> MuxEval:
+        return self.evaluate(self.enables_for_oms(oms))
+
+    def _or_select(self, tab, E):
+        # 켜진 비트가 0/1개인 벡터는 열 gather 한 번, 여러 개면 그 열들을 OR 결합
+        np = self.np
+        cnt = E.sum(axis=1)
+        col = np.where(cnt == 1, E.argmax(axis=1), -1)
+        out = np.zeros((E.shape[0], tab.shape[0]), dtype=np.int32)
+        one = np.flatnonzero(cnt == 1)
+        if one.size:
+            out[one] = tab[:, col[one]].T
+        for n in np.flatnonzero(cnt > 1).tolist():
+            out[n] = self._or_combine(tab[:, np.flatnonzero(E[n])])
+        return out
+
+    def _or_combine(self, cols) -> List[int]:
+        res = []
+        for vals in cols.tolist():
+            s = {v for v in vals if v != 0}
+            if not s:
+                res.append(0)
+            elif 1 in s:
+                res.append(1)
+            elif len(s) == 1:
+                res.append(s.pop())
+            else:
+                res.append(self._sid(" | ".join(sorted(self.sources[v] for v in s))))
+        return res
+
+    def _direct_eval(self, E):
+        np = self.np
+        out = np.zeros((E.shape[0], len(self._direct)), dtype=np.int32)
+        for j, drivers in enumerate(self._direct):
+            vals = np.stack([np.where(E[:, bit], on, off) for bit, on, off in drivers])
+            out[:, j] = np.where((vals == vals[0]).all(axis=0), vals[0], 1)
+        return out
@@ -0,0 +1,132 @@
+"""OM sweep report: OM 0..63 → per-pad routing, without simulation.
+
+각 OM 값에 대해 그 OM을 가진 서브모드(SubMode.om_values)의 셀을 PAD 순으로 나열하고,
+pad_mux가 그 PAD에 거는 OEN/출력 값(MuxEvaluator)을 붙인다. 64개 OM을 한 번에
+평가하므로 리비전 간 diff로 라우팅 회귀를 CI에서 바로 잡을 수 있다.
+"""
+
+import csv
+import io
+import json
+from typing import List, Optional, Tuple
+
+from .cellstore import CellStore
+from .codegen.common import sig_expr
+from .models import ExcelModel
+from .mux_eval import MuxEvaluator
+
+OM_COUNT = 64
+COLUMNS = ("om", "mode", "submode", "kind", "pad", "pin", "signal", "direction", "oe", "drive")
+REPORT_FORMAT = 1
+
+
+def om_owners(model: ExcelModel) -> List[Optional[Tuple[str, int]]]:
+    """OM 값 → (mode, 서브모드 번호) 또는 None. 검증(O301/O302)을 통과한 모델 기준."""
+    owners: List[Optional[Tuple[str, int]]] = [None] * OM_COUNT
+    for mode, subs in model.modes.items():
+        for k, sm in enumerate(subs):
+            for v in sm.om_values:
+                if 0 <= v < OM_COUNT and owners[v] is None:
+                    owners[v] = (mode, k)
+    return owners
+
+
+def om_sweep(model: ExcelModel, ev: Optional[MuxEvaluator] = None, store: Optional[CellStore] = None) -> List[tuple]:
+    """COLUMNS 순서의 행 목록. 서브모드가 없는 OM은 om만, 셀이 없는 서브모드는 submode까지 채운 행 하나."""
+    if ev is None:
+        ev = MuxEvaluator(model)
+    np = ev.np
+    if store is None:
+        store = CellStore(model)
+    res = ev.evaluate_oms(range(OM_COUNT))
+    src = ev.sources
+
+    # 서브모드 id 기준 (kind, pad, 행) 정렬 한 번 → 서브모드별 연속 구간
+    sub = np.asarray(store.sub)
+    order = np.lexsort((np.arange(len(store)), np.asarray(store.pad), np.asarray(store.kind), sub))
+    cut = np.searchsorted(sub[order], np.arange(len(store.subs) + 1))
+    sub_id = {id(sm): j for j, sm in enumerate(store.subs)}
+
+    owners = om_owners(model)
+    om_of, rows_of = [], []
+    for om, own in enumerate(owners):
+        if own is None:
+            continue
+        j = sub_id[id(model.modes[own[0]][own[1]])]
+        seg = order[cut[j] : cut[j + 1]]
+        om_of.append(np.full(seg.size, om))
+        rows_of.append(seg)
+    om_idx = np.concatenate(om_of) if om_of else np.zeros(0, dtype=int)
+    rows = np.concatenate(rows_of) if rows_of else np.zeros(0, dtype=int)
+
+    # IO PAD 행의 OEN/I 열을 (OM, 출력) 쌍으로 한 번에 gather. I PAD는 -1(빈 칸).
+    kind = np.asarray(store.kind)[rows]
+    pad = np.asarray(store.pad)[rows]
+    is_io = kind == 1
+    oen_col = np.full(rows.size, -1)
+    drv_col = np.full(rows.size, -1)
+    pos = ev.pad_pos
+    oen_col[is_io] = [pos[("IO", p, "OEN")] for p in pad[is_io].tolist()]
+    drv_col[is_io] = [pos[("IO", p, "I")] for p in pad[is_io].tolist()]
+    oe = np.where(is_io, res.pad[om_idx, np.maximum(oen_col, 0)], -1)
+    drive = np.where(is_io, res.pad[om_idx, np.maximum(drv_col, 0)], -1)
+
+    out: List[tuple] = []
+    per_om = iter(zip(om_idx.tolist(), rows.tolist(), oe.tolist(), drive.tolist()))
+    nxt = next(per_om, None)
+    for om, own in enumerate(owners):
+        if own is None:
+            out.append((om,) + ("",) * (len(COLUMNS) - 1))
+            continue
+        mode, k = own
+        sm_name = model.modes[mode][k].name
+        if nxt is None or nxt[0] != om:
+            # 셀이 없는 서브모드
+            out.append((om, mode, sm_name) + ("",) * (len(COLUMNS) - 3))
+        while nxt is not None and nxt[0] == om:
+            _, r, o, d = nxt
+            c = store.cells[r]
+            pads = model.pads_I if c.pad_kind == "I" else model.pads_IO
+            out.append(
+                (om, mode, sm_name, c.pad_kind, c.pad_index, pads[c.pad_index].name, sig_expr(c), c.direction, src[o] if o >= 0 else "", src[d] if d >= 0 else "")
+            )
+            nxt = next(per_om, None)
+    return out
+
+
+def om_sweep_csv(rows: List[tuple]) -> str:
+    buf = io.StringIO()
+    w = csv.writer(buf, lineterminator="\n")
+    w.writerow(COLUMNS)
+    w.writerows(rows)
+    return buf.getvalue().rstrip("\n")
+
+
+def om_sweep_json(rows: List[tuple]) -> str:
+    # OM별로 묶고 PAD 하나를 한 줄(COLUMNS[3:] 순서 배열)로 쓴다 — 줄 단위 diff가 곧 라우팅 변경.
+    # 서브모드가 없는 OM은 mode/submode가 null, pads가 빈 목록.
+    groups: List[tuple] = []
+    for r in rows:
+        if not groups or groups[-1][0][0] != r[0]:
+            groups.append((r, []))
+        if r[3]:
+            groups[-1][1].append(r[3:])
+    dumps = json.dumps
+    lines = ["{", f' "format": {REPORT_FORMAT},', ' "pad_columns": ' + dumps(list(COLUMNS[3:])) + ",", ' "oms": [']
+    for g, (head, pads) in enumerate(groups):
+        om, mode, sub = head[0], head[1] or None, head[2] or None
+        comma = "," if g < len(groups) - 1 else ""
+        obj = f'  {{"om": {om}, "mode": {dumps(mode)}, "submode": {dumps(sub)}, "pads": ['
+        if not pads:
+            lines.append(obj + "]}" + comma)
+            continue
+        lines.append(obj)
+        lines.extend(f"   {dumps(list(p))}{',' if k < len(pads) - 1 else ''}" for k, p in enumerate(pads))
+        lines.append("  ]}" + comma)
+    lines += [" ]", "}"]
+    return "\n".join(lines)
+
+
+def om_report(model: ExcelModel, fmt: str, ev: Optional[MuxEvaluator] = None, store: Optional[CellStore] = None) -> str:
+    rows = om_sweep(model, ev, store)
+    return om_sweep_csv(rows) if fmt == "csv" else om_sweep_json(rows)
@@ -0,0 +1,152 @@
+import hashlib
+import json
+import os
+from typing import Dict, Iterable, List, Optional, Tuple
+
+MANIFEST_NAME = ".iomux_manifest.json"
+MANIFEST_FORMAT = 1
+STAMP_PREFIX = "// Generated at "
+WRITE_BUFFER = 1 << 16
+# 같은 TOOL_VERSION에서 생성 결과가 바뀌면 올려서 incremental fingerprint를 무효화
+CODEGEN_REV = 2
+
+
+def fingerprint(*parts) -> str:
+    h = hashlib.sha256()
+    for p in parts:
+        h.update(repr(p).encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+def _strip_stamp(text: str) -> str:
+    # 배너의 생성 시각 줄은 내용 비교에서 제외
+    return "\n".join(ln for ln in text.split("\n") if not ln.startswith(STAMP_PREFIX))
+
+
+def _same_file(a: str, b: str) -> bool:
+    # 두 파일을 줄 단위로 비교(생성 시각 줄 제외). 파일 전체를 메모리에 올리지 않는다.
+    try:
+        with open(a, "r", encoding="utf-8", newline="") as fa, open(b, "r", encoding="utf-8", newline="") as fb:
+            la = (ln for ln in fa if not ln.startswith(STAMP_PREFIX))
+            lb = (ln for ln in fb if not ln.startswith(STAMP_PREFIX))
+            sentinel = object()
+            for x, y in zip(la, lb):
+                if x != y:
+                    return False
+            return next(la, sentinel) is sentinel and next(lb, sentinel) is sentinel
+    except OSError:
+        return False
+
+
+# outdir 아래 생성 파일을 기록하는 writer. manifest에 파일별 fingerprint를 남긴다.
+# incremental 모드에서는 내용(생성 시각 줄 제외)이 같으면 쓰지 않고, fresh()가 True면
+# 호출자가 생성 자체를 생략할 수 있다. 이전 manifest에만 있는 파일은 incremental일 때 finish()에서 삭제.
+class OutputWriter:
+    def __init__(self, outdir: str, incremental: bool = False):
+        self.outdir = outdir
+        self.incremental = incremental
+        self.written: List[str] = []
+        self.skipped: List[str] = []
+        self.removed: List[str] = []
+        self._old: Dict[str, Optional[str]] = self._load_manifest()
+        self._new: Dict[str, Optional[str]] = {}
+
+    def _load_manifest(self) -> Dict[str, Optional[str]]:
+        try:
+            with open(os.path.join(self.outdir, MANIFEST_NAME), "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("format") == MANIFEST_FORMAT:
+                return dict(data.get("files", {}))
+        except (OSError, ValueError):
+            pass
+        return {}
+
+    def fresh(self, rel: str, fp: str) -> bool:
+        if not self.incremental or self._old.get(rel) != fp:
+            return False
+        if not os.path.isfile(os.path.join(self.outdir, rel)):
+            return False
+        self._new[rel] = fp
+        self.skipped.append(rel)
+        return True
+
+    def write(self, rel: str, text: str, fp: Optional[str] = None):
+        path = os.path.join(self.outdir, rel)
+        self._new[rel] = fp
+        if self.incremental:
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    old = f.read()
+                if old == text or _strip_stamp(old) == _strip_stamp(text):
+                    self.skipped.append(rel)
+                    return
+            except OSError:
+                pass
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+        self.written.append(rel)
+
+    def write_lines(self, rel: str, lines: Iterable[str], fp: Optional[str] = None) -> Tuple[int, int]:
+        # "\n".join(lines)를 버퍼 단위로 임시 파일에 흘려 쓰고 교체. (줄 수, 바이트 수)를 돌려준다.
+        path = os.path.join(self.outdir, rel)
+        tmp = f"{path}.tmp{os.getpid()}"
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        n_lines = 0
+        n_bytes = 0
+        try:
+            with open(tmp, "w", encoding="utf-8", newline="", buffering=WRITE_BUFFER) as f:
+                sep = ""
+                for ln in lines:
+                    chunk = sep + ln
+                    f.write(chunk)
+                    n_lines += ln.count("\n") + 1
+                    sep = "\n"
+            n_bytes = os.path.getsize(tmp)
+            if self.incremental and _same_file(tmp, path):
+                os.remove(tmp)
+                self._new[rel] = fp
+                self.skipped.append(rel)
+                return n_lines, n_bytes
+            os.replace(tmp, path)
+        except BaseException:
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+            raise
+        self._new[rel] = fp
+        self.written.append(rel)
+        return n_lines, n_bytes
+
+    def _prunable(self, rel: str) -> Optional[str]:
+        # manifest는 outdir 안의 사용자 편집 가능 파일이므로 그대로 믿지 않는다:
+        # 절대 경로, `..` 구성요소, realpath가 outdir 밖인 경로는 지우지 않는다.
+        if not rel or os.path.isabs(rel) or ".." in rel.replace("\\", "/").split("/"):
+            return None
+        root = os.path.realpath(self.outdir)
+        path = os.path.realpath(os.path.join(root, rel))
+        if os.path.commonpath([root, path]) != root or path == root:
+            return None
+        return os.path.join(self.outdir, rel)
+
+    def finish(self):
+        # 삭제는 incremental 모드에서만(기본 실행은 이전 실행의 파일을 건드리지 않는다)
+        if self.incremental:
+            for rel in sorted(set(self._old) - set(self._new)):
+                path = self._prunable(rel)
+                if path is None:
+                    continue
+                try:
+                    os.remove(path)
+                    self.removed.append(rel)
+                except OSError:
+                    pass
+        os.makedirs(self.outdir, exist_ok=True)
+        with open(os.path.join(self.outdir, MANIFEST_NAME), "w", encoding="utf-8") as f:
+            json.dump({"format": MANIFEST_FORMAT, "files": self._new}, f, indent=1, sort_keys=True)
+        self._old = dict(self._new)
+
+    def summary(self) -> str:
+        return f"written={len(self.written)} skipped={len(self.skipped)} removed={len(self.removed)}"
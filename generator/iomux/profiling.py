@@ -0,0 +1,114 @@
+import json
+import sys
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+from .banner import TOOL_VERSION
+
+# 단계별 계측. 활성 Profiler가 없으면 stage()/count()는 아무것도 하지 않는다.
+# 시간/메모리는 포함(inclusive) 값이며, 같은 이름의 단계는 호출 횟수와 함께 누적된다.
+_ACTIVE: Optional["Profiler"] = None
+
+
+class Profiler:
+    def __init__(self, trace_memory: bool = True):
+        self.trace_memory = trace_memory
+        self.stages: Dict[str, Dict[str, Any]] = {}
+        self.counts: Dict[str, int] = {}
+        self.meta: Dict[str, Any] = {}
+        self._peaks: List[int] = []
+        self._t0 = time.perf_counter()
+        self._c0 = time.process_time()
+
+    @contextmanager
+    def stage(self, name: str):
+        import tracemalloc
+
+        mem = self.trace_memory and tracemalloc.is_tracing()
+        if mem:
+            base, cur_peak = tracemalloc.get_traced_memory()
+            if self._peaks:
+                self._peaks[-1] = max(self._peaks[-1], cur_peak)
+            tracemalloc.reset_peak()
+            self._peaks.append(0)
+        t0 = time.perf_counter()
+        c0 = time.process_time()
+        try:
+            yield
+        finally:
+            wall = time.perf_counter() - t0
+            cpu = time.process_time() - c0
+            peak = 0
+            if mem:
+                # 하위 단계가 reset_peak()를 호출하므로 하위 단계까지의 peak와 현재 peak 중 큰 값을 사용
+                abs_peak = max(tracemalloc.get_traced_memory()[1], self._peaks.pop())
+                if self._peaks:
+                    self._peaks[-1] = max(self._peaks[-1], abs_peak)
+                peak = abs_peak - base
+            ent = self.stages.setdefault(name, {"calls": 0, "wall_s": 0.0, "cpu_s": 0.0, "peak_bytes": 0})
+            ent["calls"] += 1
+            ent["wall_s"] += wall
+            ent["cpu_s"] += cpu
+            ent["peak_bytes"] = max(ent["peak_bytes"], max(0, peak))
+
+    def count(self, key: str, n: int = 1):
+        self.counts[key] = self.counts.get(key, 0) + n
+
+    def report(self) -> Dict[str, Any]:
+        rep: Dict[str, Any] = {
+            "tool_version": TOOL_VERSION,
+            "python": sys.version.split()[0],
+            "meta": dict(self.meta),
+            "total": {"wall_s": time.perf_counter() - self._t0, "cpu_s": time.process_time() - self._c0},
+            "stages": [dict(name=k, **v) for k, v in self.stages.items()],
+            "counts": dict(self.counts),
+        }
+        try:
+            import resource
+
+            rep["total"]["max_rss_kb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        except ImportError:
+            pass
+        return rep
+
+    def dump(self, path: str):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.report(), f, indent=2)
+            f.write("\n")
+
+
+@contextmanager
+def activate(prof: Optional[Profiler]):
+    global _ACTIVE
+    prev = _ACTIVE
+    _ACTIVE = prof
+    started = False
+    if prof is not None and prof.trace_memory:
+        import tracemalloc
+
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            started = True
+    try:
+        yield prof
+    finally:
+        if started:
+            import tracemalloc
+
+            tracemalloc.stop()
+        _ACTIVE = prev
+
+
+@contextmanager
+def stage(name: str):
+    if _ACTIVE is None:
+        yield
+        return
+    with _ACTIVE.stage(name):
+        yield
+
+
+def count(key: str, n: int = 1):
+    if _ACTIVE is not None:
+        _ACTIVE.count(key, n)
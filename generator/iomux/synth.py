@@ -0,0 +1,153 @@
+"""Synthetic pinout workbook generator (§3.2 block layout) for benchmarks."""
+
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Set
+
+MODE_TITLES = {"normal": "Normal Mode", "scan": "Scan Mode", "ipdt": "IPDT Mode"}
+MODE_OM_BASE = {"normal": 0, "scan": 32, "ipdt": 48}
+MODE_MAX_SUBS = {"normal": 32, "scan": 16, "ipdt": 16}
+PT_IN = "PDIDWUWSWCDG"
+PT_IO = "PDDWUWSWCDG"
+SYNTH_PAD_TYPES: Dict[str, str] = {PT_IN: "I", PT_IO: "IO"}
+SYNTH_EXCLUDE: Set[str] = {"OM", "PORn"}
+
+
+@dataclass
+class SynthSpec:
+    n_in: int = 16
+    n_io: int = 84
+    normal: int = 3
+    scan: int = 1
+    ipdt: int = 1
+    bus_width: int = 8
+    gpio_width: int = 4
+    coverage: float = 0.75
+    io_test: bool = True
+    nand_tree: bool = True
+    block_width: int = 4
+
+    @property
+    def n_pads(self) -> int:
+        return self.n_in + self.n_io
+
+
+def spec_for(pads: int, submodes: int, **kw) -> SynthSpec:
+    # 총 PAD/서브모드 수를 모드별 상한(32/16/16) 안에서 normal→scan→ipdt 비율로 분배
+    n_in = max(1, pads // 8)
+    fixed = int(kw.get("io_test", True)) + int(kw.get("nand_tree", True))
+    rest = max(1, min(submodes, 64) - fixed)
+    normal = min(MODE_MAX_SUBS["normal"], max(1, (rest + 1) // 2))
+    scan = min(MODE_MAX_SUBS["scan"], max(0, (rest - normal + 1) // 2))
+    ipdt = min(MODE_MAX_SUBS["ipdt"] - fixed, max(0, rest - normal - scan))
+    return SynthSpec(n_in=n_in, n_io=max(1, pads - n_in), normal=normal, scan=scan, ipdt=ipdt, **kw)
+
+
+def _submodes(spec: SynthSpec) -> List[tuple]:
+    subs = []
+    for k in range(spec.normal):
+        subs.append(("normal", "normal" if k == 0 else f"normal_f{k}"))
+    for k in range(spec.scan):
+        subs.append(("scan", f"scan_s{k}"))
+    for k in range(spec.ipdt):
+        subs.append(("ipdt", f"ipdt_p{k}"))
+    if spec.io_test:
+        subs.append(("ipdt", "io_test"))
+    if spec.nand_tree:
+        subs.append(("ipdt", "nand_tree"))
+    return subs
+
+
+def _cells_for(spec: SynthSpec, si: int, mode: str, name: str) -> List[Optional[tuple]]:
+    # PAD 행마다 (signal, direction, default) 또는 None
+    n = spec.n_pads
+    out: List[Optional[tuple]] = [None] * n
+    if name == "io_test":
+        for p in range(n):
+            out[p] = (f"io_test_in[{p}]", "I", "") if p < spec.n_in else (f"io_test_io[{p - spec.n_in}]", "IO", "")
+        return out
+    if name == "nand_tree":
+        for p in range(n - 1):
+            out[p] = (f"nand_tree_in[{p}]", "I", "")
+        out[n - 1] = ("nand_tree_out", "O", "")
+        return out
+
+    tag = name.replace(f"{mode}_", "") if name != mode else "f0"
+    picked = [p for p in range(n) if ((p * 7 + si * 13) % 100) < int(spec.coverage * 100)]
+    ins = [p for p in picked if p < spec.n_in]
+    ios = [p for p in picked if p >= spec.n_in]
+    gpio = ios[: spec.gpio_width] if mode == "normal" else []
+    ios = ios[len(gpio):]
+    for i, p in enumerate(gpio):
+        out[p] = (f"{mode}_{tag}_gpio[{i}]", "IO", "")
+    W = max(1, spec.bus_width)
+    for j in range(0, len(ins), W):
+        for i, p in enumerate(ins[j : j + W]):
+            out[p] = (f"{mode}_{tag}_in{j // W}[{i}]", "I", "1" if i == 0 else "")
+    for j in range(0, len(ios), W):
+        kind = (j // W) % 3
+        for i, p in enumerate(ios[j : j + W]):
+            b = f"{mode}_{tag}_b{j // W}"
+            if kind == 0:
+                out[p] = (f"{b}[{i}]", "I", "")
+            elif kind == 1:
+                out[p] = (f"{b}[{i}]", "O", "")
+            else:
+                out[p] = (f"{b}[{i}] / {b}_oen[{i}]", "IO", "")
+    return out
+
+
+def write_workbook(path: str, spec: SynthSpec, sheet: str = "Sheet1"):
+    import openpyxl
+    from openpyxl.utils import get_column_letter
+
+    W = max(4, spec.block_width)
+    subs = _submodes(spec)
+    wb = openpyxl.Workbook(write_only=True)
+    ws = wb.create_sheet(sheet)
+    om_next = dict(MODE_OM_BASE)
+    hdr_mode: List[Optional[str]] = ["Pin Group", "Pin Name", "PAD type"]
+    hdr_sub: List[Optional[str]] = [None, None, None]
+    hdr_om: List[Optional[str]] = [None, None, None]
+    for ci in range(3):
+        col = get_column_letter(ci + 1)
+        ws.merged_cells.add(f"{col}1:{col}3")
+    mode_start: Dict[str, int] = {}
+    for mode, name in subs:
+        c0 = len(hdr_mode)
+        mode_start.setdefault(mode, c0)
+        om = om_next[mode]
+        om_next[mode] += 1
+        hdr_mode += [MODE_TITLES[mode]] + [None] * (W - 1)
+        hdr_sub += [name] + [None] * (W - 1)
+        hdr_om += [f"OM = 6'h{om:02X}"] + [None] * (W - 1)
+        a, b = get_column_letter(c0 + 1), get_column_letter(c0 + W)
+        ws.merged_cells.add(f"{a}2:{b}2")
+        ws.merged_cells.add(f"{a}3:{b}3")
+    for mode, c0 in mode_start.items():
+        c1 = c0 + W * sum(1 for m, _ in subs if m == mode)
+        ws.merged_cells.add(f"{get_column_letter(c0 + 1)}1:{get_column_letter(c1)}1")
+        for c in range(c0 + 1, c1):
+            hdr_mode[c] = None
+    ws.append(hdr_mode)
+    ws.append(hdr_sub)
+    ws.append(hdr_om)
+
+    for k in range(6):
+        ws.append(["Operation Mode", f"OM[{5 - k}]", f"{PT_IN}_V"])
+    ws.append(["Reset", "PORn", f"{PT_IN}_V"])
+
+    cols = [_cells_for(spec, si, mode, name) for si, (mode, name) in enumerate(subs)]
+    for p in range(spec.n_pads):
+        if p < spec.n_in:
+            row = ["Input", f"IN[{p}]", f"{PT_IN}_V"]
+        else:
+            row = ["GPIO", f"GPIO[{p - spec.n_in}]", f"{PT_IO}_{'H' if p % 2 else 'V'}"]
+        for col in cols:
+            ent = col[p]
+            if ent is None:
+                row += [None] * W
+            else:
+                sig, d, dflt = ent
+                row += [sig] + [None] * (W - 4) + ["", d, dflt]
+        ws.append(row)
+    wb.save(path)
@@ -1,5 +1,5 @@
 import re
-from typing import Any, Dict, List, Optional, Set, Tuple
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
 
 
 def norm(x: Any) -> str:
@@ -71,40 +71,67 @@ def align_bracket_num(txt: str, width: int) -> str:
     return s.rjust(width)
 
 
+def _col_width(col) -> int:
+    return max(map(len, col), default=0)
+
+
+def _pad_col(col, width: int):
+    # 열 전체를 width로 왼쪽 정렬. 이미 모두 같은 폭이면 그대로 돌려준다.
+    if min(map(len, col), default=width) == width:
+        return col
+    return [v.ljust(width) for v in col]
+
+
+def _bracket_col(col, width: int) -> List[str]:
+    # align_bracket_num을 열 전체에 적용. 값의 종류가 적으므로(폭/배열 표기) 고유값만 포맷한다.
+    if width <= 0:
+        return [""] * len(col)
+    fmt = {v: align_bracket_num(v, width) for v in set(col)}
+    return list(map(fmt.__getitem__, col))
+
+
+# 정렬 엔진(align_ports/align_decls): 항목을 열별 병렬 배열로 옮겨 열 폭을 한 번에 구하고(map(len)),
+# 고유값 포맷/동일 폭 열 생략 후 행 문자열을 일괄 조립한다. 출력은 행 단위 구현과 바이트 단위로 같다.
+# align_assign_pairs/align_instance는 열 방식이 이기지 못해(bench align) 행 단위 그대로 둔다.
 def align_ports(entries: List[Dict[str, str]]) -> Tuple[List[str], int]:
     if not entries:
         return [], 0
-    DIR_W = max((len(e["direction"]) for e in entries if not e.get("iface")), default=0)
-    TYP_W = max((len(e["type"]) for e in entries if not e.get("iface")), default=0)
-    IF_W = max((len(e["iface"]) for e in entries if e.get("iface")), default=0)
-    LEFT_W = max(IF_W, (DIR_W + (1 if TYP_W > 0 else 0) + TYP_W))
-    BITS_W = max(len(e["bits"]) for e in entries) if entries else 0
-    ARR_W = max(len(e["array"]) for e in entries) if entries else 0
-    NAME_W = max(len(e["name"]) for e in entries) if entries else 0
-    lines = []
-    for i, e in enumerate(entries):
-        if e.get("iface"):
-            left = e["iface"].ljust(LEFT_W)
-        else:
-            left = (
-                e["direction"].ljust(DIR_W)
-                + (" " if TYP_W > 0 else "")
-                + e["type"].ljust(LEFT_W - DIR_W - (1 if TYP_W > 0 else 0))
-            )
-        bits = align_bracket_num(e["bits"], BITS_W)
-        arr = (" " + align_bracket_num(e["array"], ARR_W)) if e["array"] else " " * (ARR_W + 1 if ARR_W > 0 else 1)
-        comma = "," if i < len(entries) - 1 else ""
-        lines.append(f"  {left}  {bits}  {e['name']:<{NAME_W}}{arr}{comma}")
+    dirs = [e["direction"] for e in entries]
+    types = [e["type"] for e in entries]
+    ifaces = [e.get("iface") or "" for e in entries]
+    bits = [e["bits"] for e in entries]
+    arrs = [e["array"] for e in entries]
+    names = [e["name"] for e in entries]
+    plain = [(d, t) for d, t, f in zip(dirs, types, ifaces) if not f]
+    DIR_W = max((len(d) for d, _ in plain), default=0)
+    TYP_W = max((len(t) for _, t in plain), default=0)
+    IF_W = _col_width([f for f in ifaces if f])
+    sep = " " if TYP_W > 0 else ""
+    LEFT_W = max(IF_W, DIR_W + len(sep) + TYP_W)
+    typ_w = LEFT_W - DIR_W - len(sep)
+    left_of = {}
+    for key in set(zip(dirs, types, ifaces)):
+        d, t, f = key
+        left_of[key] = f.ljust(LEFT_W) if f else d.ljust(DIR_W) + sep + t.ljust(typ_w)
+    lefts = list(map(left_of.__getitem__, zip(dirs, types, ifaces)))
+    ARR_W = _col_width(arrs)
+    empty_arr = " " * (ARR_W + 1 if ARR_W > 0 else 1)
+    arr_of = {a: ((" " + align_bracket_num(a, ARR_W)) if a else empty_arr) for a in set(arrs)}
+    arr_txt = list(map(arr_of.__getitem__, arrs))
+    names = _pad_col(names, _col_width(names))
+    bits = _bracket_col(bits, _col_width(bits))
+    lines = [f"  {l}  {b}  {n}{a}," for l, b, n, a in zip(lefts, bits, names, arr_txt)]
+    lines[-1] = lines[-1][:-1]
     return lines, 2
 
 
 def align_decls(decls: List[Tuple[str, str, str]]) -> List[str]:
     if not decls:
         return []
-    T_W = max(len(t) for t, _, _ in decls)
-    B_W = max(len(b) for _, b, _ in decls)
-    N_W = max(len(n) for _, _, n in decls)
-    return [f"  {t.ljust(T_W)}  {align_bracket_num(b, B_W)}  {n};" for t, b, n in decls]
+    types, bits, names = zip(*decls)
+    types = _pad_col(types, _col_width(types))
+    bits = _bracket_col(bits, _col_width(bits))
+    return [f"  {t}  {b}  {n};" for t, b, n in zip(types, bits, names)]
 
 
 def align_assign_pairs(pairs: List[Tuple[str, str]]) -> List[str]:
@@ -114,6 +141,12 @@ def align_assign_pairs(pairs: List[Tuple[str, str]]) -> List[str]:
     return [f"  assign {lhs.ljust(L_W)} = {rhs};" for lhs, rhs in pairs]
 
 
+def iter_assign_pairs(pairs: Iterable[Tuple[str, str]], lhs_w: int) -> Iterator[str]:
+    # align_assign_pairs의 스트리밍 판: lhs 폭(lhs_w)은 호출 측이 lhs만으로 미리 구해 넘긴다.
+    for lhs, rhs in pairs:
+        yield f"  assign {lhs.ljust(lhs_w)} = {rhs};"
+
+
 def align_instance(conns: List[Tuple[str, str]]) -> List[str]:
     PW = max(len(k) for k, _ in conns)
     VW = max(len(v) for _, v in conns)
@@ -194,7 +227,26 @@ def gpio_like_port_entries(base: str, width: int) -> List[Dict[str, str]]:
     return ent
 
 
-def en_names_for_base(base: str, en_w_map: Dict[str, int]) -> List[str]:
+OE_SUFFIXES = ("_oen_n", "_oe_n", "_oen", "_oe")
+
+
+def build_en_index(en_names) -> Dict[str, List[str]]:
+    # base(소문자, 인덱스 제거) → enable 이름(정렬). is_valid_oe_for_base와 같은 매칭 규칙
+    idx: Dict[str, List[str]] = {}
+    for eb in en_names:
+        e = strip_idx(eb).lower()
+        for suf in OE_SUFFIXES:
+            if e.endswith(suf):
+                idx.setdefault(e[: -len(suf)], []).append(eb)
+                break
+    for v in idx.values():
+        v.sort()
+    return idx
+
+
+def en_names_for_base(base: str, en_w_map: Dict[str, int], en_index: Optional[Dict[str, List[str]]] = None) -> List[str]:
+    if en_index is not None:
+        return list(en_index.get(strip_idx(base).lower(), ()))
     out: List[str] = []
     for eb in en_w_map.keys():
         if is_valid_oe_for_base(base, eb):
@@ -1,88 +1,111 @@
-from typing import Dict, Set
+from typing import Dict, Iterator, List, Optional, Set, Tuple
 
-from .errors import SpecError
+from .errors import SpecError, SpecErrors
 from .models import ExcelModel
-from .utils import is_active_low_oe, strip_idx
+from .utils import OE_SUFFIXES, strip_idx
 
+OM_RANGES = (("normal", 0, 31), ("scan", 32, 47), ("ipdt", 48, 63))
 
-def validate(model: ExcelModel):
-    def check(mode, subs, lo, hi):
-        seen: Set[int] = set()
-        for sm in subs:
-            for v in sm.om_values:
-                if not (lo <= v <= hi):
-                    raise SpecError("O301", {"mode": mode, "om": v})
-                if v in seen:
-                    raise SpecError("O302", {"mode": mode, "om": v})
-                seen.add(v)
 
-    check("normal", model.modes["normal"], 0, 31)
-    check("scan", model.modes["scan"], 32, 47)
-    check("ipdt", model.modes["ipdt"], 48, 63)
+def _split_oe(name: str):
+    n = strip_idx(name)
+    nl = n.lower()
+    for suf in OE_SUFFIXES:
+        if nl.endswith(suf):
+            return n[: -len(suf)], suf
+    return None, None
 
-    for _, subs in model.modes.items():
-        for sm in subs:
-            for c in sm.cells:
-                if c.enable:
-                    def split_oe(name: str):
-                        n = strip_idx(name)
-                        nl = n.lower()
-                        for suf in ("_oen_n", "_oe_n", "_oen", "_oe"):
-                            if nl.endswith(suf):
-                                return n[: -len(suf)], suf
-                        return None, None
 
-                    base_sig = strip_idx(c.base)
-                    en_base, suf = split_oe(c.enable)
-                    if suf is None:
-                        raise SpecError("C403", {"signal": c.base, "enable": c.enable, "submode": sm.name})
-                    if (en_base or "").strip().lower() != base_sig.strip().lower():
-                        raise SpecError("C402", {"signal": c.base, "enable": c.enable, "submode": sm.name})
+def _oe_error(c, sm_name: str) -> Optional[SpecError]:
+    en_base, suf = _split_oe(c.enable)
+    if suf is None:
+        return SpecError("C403", {"signal": c.base, "enable": c.enable, "submode": sm_name})
+    if (en_base or "").strip().lower() != strip_idx(c.base).strip().lower():
+        return SpecError("C402", {"signal": c.base, "enable": c.enable, "submode": sm_name})
+    return None
+
+
+def _bus_errors(mode: str, idx_map: Dict[str, Set[int]], scalar: Set[str]) -> Iterator[SpecError]:
+    # idx_map: 인덱스가 쓰인 base → 인덱스 집합(base 첫 등장 순)
+    for base, s in idx_map.items():
+        if base in scalar:
+            yield SpecError("B102", {"mode": mode, "base": base})
+        elif len(s) != max(s) + 1:
+            yield SpecError("B101", {"mode": mode, "base": base, "indices": sorted(s), "expect": f"0..{max(s)}"})
 
-    for mode, subs in model.modes.items():
-        for sm in subs:
-            seen_pairs = set()
-            for c in sm.cells:
-                if c.base_idx is not None:
-                    key = (c.base, c.base_idx)
-                    if key in seen_pairs:
-                        raise SpecError("B103", {"mode": mode, "submode": sm.name, "base": c.base, "idx": c.base_idx})
-                    seen_pairs.add(key)
 
-        idx_map: Dict[str, set] = {}
-        has_scalar: Dict[str, bool] = {}
+def iter_errors(model: ExcelModel, directions: bool = False) -> Iterator[SpecError]:
+    # 모델을 한 번만 순회한다(OM 값, OE 네이밍, 버스 인덱스를 같은 루프에서 검사).
+    # 보고 순서: O301/O302(normal→scan→ipdt) → C403/C402(셀 순) → 모드별 B103 → B102/B101 → 전역 B102/B101.
+    # O 오류는 바로 내고, C/B 오류는 순서를 지키려 버퍼에 모았다가 순회 후 낸다.
+    # 첫 오류만 필요하면 next()로 꺼내고 멈춘다(기존 first-error 순서와 동일).
+    ranges = {mode: (lo, hi) for mode, lo, hi in OM_RANGES}
+    oe_errs: List[SpecError] = []
+    bus_errs: List[SpecError] = []
+    g_idx: Dict[str, Set[int]] = {}
+    g_scalar: Set[str] = set()
+    g_dir: Dict[str, Set[bool]] = {}
+    u902: List[SpecError] = []
+    for mode, subs in model.modes.items():
+        lo, hi = ranges[mode]
+        om_seen: Set[int] = set()
+        idx_map: Dict[str, Set[int]] = {}
+        scalar: Set[str] = set()
+        dirs: Dict[str, Set[bool]] = {}
         for sm in subs:
-            for c in sm.cells:
-                b = c.base
-                if c.base_idx is None:
-                    has_scalar[b] = True
+            for v in sm.om_values:
+                if not (lo <= v <= hi):
+                    yield SpecError("O301", {"mode": mode, "om": v})
+                elif v in om_seen:
+                    yield SpecError("O302", {"mode": mode, "om": v})
                 else:
-                    idx_map.setdefault(b, set()).add(c.base_idx)
+                    om_seen.add(v)
+            seen: Set[Tuple[str, int]] = set()
+            for c in sm.cells:
+                if c.enable:
+                    e = _oe_error(c, sm.name)
+                    if e is not None:
+                        oe_errs.append(e)
+                b, i = c.base, c.base_idx
+                if directions:
+                    dirs.setdefault(b, set()).add(c.direction == "I")
+                if i is None:
+                    scalar.add(b)
+                    continue
+                if (b, i) in seen:
+                    bus_errs.append(SpecError("B103", {"mode": mode, "submode": sm.name, "base": b, "idx": i}))
+                seen.add((b, i))
+                idx_map.setdefault(b, set()).add(i)
+        bus_errs.extend(_bus_errors(mode, idx_map, scalar))
         for b, s in idx_map.items():
-            if has_scalar.get(b, False):
-                raise SpecError("B102", {"mode": mode, "base": b})
-            if s:
-                mx = max(s)
-                expect = set(range(0, mx + 1))
-                if s != expect:
-                    raise SpecError("B101", {"mode": mode, "base": b, "indices": sorted(s), "expect": f"0..{mx}"})
+            g_idx.setdefault(b, set()).update(s)
+        g_scalar |= scalar
+        for b, v in dirs.items():
+            g_dir.setdefault(b, set()).update(v)
+            if len(v) > 1:
+                u902.append(SpecError("U902", {"base": b, "mode": mode}))
+    yield from oe_errs
+    yield from bus_errs
+    yield from _bus_errors("*", g_idx, g_scalar)
+
+    if directions:
+        # U902는 평소 signal index 단계에서 보고된다. 전체 보고 모드에서만 미리 모은다.
+        yield from u902
+        seen_base = {e.ctx["base"] for e in u902}
+        for b, v in g_dir.items():
+            if len(v) > 1 and b not in seen_base:
+                yield SpecError("U902", {"base": b})
 
-    g_idx: Dict[str, set] = {}
-    g_scalar: Dict[str, bool] = {}
-    for subs in model.modes.values():
-        for sm in subs:
-            for c in sm.cells:
-                b = c.base
-                if c.base_idx is None:
-                    g_scalar[b] = True
-                else:
-                    g_idx.setdefault(b, set()).add(c.base_idx)
-    for b, s in g_idx.items():
-        if g_scalar.get(b, False):
-            raise SpecError("B102", {"mode": "*", "base": b})
-        if s:
-            mx = max(s)
-            expect = set(range(0, mx + 1))
-            if s != expect:
-                raise SpecError("B101", {"mode": "*", "base": b, "indices": sorted(s), "expect": f"0..{mx}"})
 
+def validate(model: ExcelModel, all_errors: bool = False):
+    errors = iter_errors(model, directions=all_errors)
+    if not all_errors:
+        e = next(errors, None)
+        if e is not None:
+            raise e
+        return
+    found = list(errors)
+    if len(found) == 1:
+        raise found[0]
+    if found:
+        raise SpecErrors(found)
@@ -0,0 +1,118 @@
+import os
+import sys
+import time
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+from .cache import file_digest
+from .driver import generate_outputs, open_workbook, select_sheet
+from .errors import SpecError
+from .excel import parse_sheet
+from .models import ExcelModel
+from .output import OutputWriter
+from .validate import validate
+
+
+class WatchState:
+    def __init__(self):
+        self.stat_sig: Optional[Tuple[int, int]] = None
+        self.digest: Optional[str] = None
+        self.model: Optional[ExcelModel] = None
+        self.sheet: Optional[str] = None
+
+
+def _ms(t0: float) -> float:
+    return (time.perf_counter() - t0) * 1000.0
+
+
+def regenerate(
+    state: WatchState,
+    xlsx_path: str,
+    outdir: str,
+    pad_types: Dict[str, str],
+    mux_exclude: Set[str],
+    sheet: Optional[str] = None,
+    jobs: int = 1,
+    mux_style: str = "unrolled",
+    all_errors: bool = False,
+    om_report: Sequence[str] = (),
+    tb_style: str = "unrolled",
+    tb_shards: Optional[str] = None,
+) -> Optional[List[Tuple[str, float]]]:
+    # 변경 감지(mtime/size → sha256) 후 영향받는 단계만 재실행. 재실행한 단계별 지연(ms)을 돌려준다.
+    st = os.stat(xlsx_path)
+    sig = (st.st_mtime_ns, st.st_size)
+    if sig == state.stat_sig:
+        return None
+    state.stat_sig = sig
+    stages: List[Tuple[str, float]] = []
+
+    t0 = time.perf_counter()
+    digest = file_digest(xlsx_path)
+    stages.append(("hash", _ms(t0)))
+    if digest == state.digest:
+        return stages
+
+    t0 = time.perf_counter()
+    wb = open_workbook(xlsx_path)
+    try:
+        ws, g = select_sheet(wb, sheet)
+        model = parse_sheet(ws, pad_types, mux_exclude, grid=g)
+        sheet_title = ws.title
+    finally:
+        wb.close()
+    stages.append(("parse", _ms(t0)))
+
+    t0 = time.perf_counter()
+    validate(model, all_errors=all_errors)
+    stages.append(("validate", _ms(t0)))
+    state.digest = digest
+    if model == state.model and sheet_title == state.sheet:
+        return stages
+
+    t0 = time.perf_counter()
+    out = OutputWriter(outdir, incremental=True)
+    generate_outputs(model, sheet_title, xlsx_path, outdir, out=out, jobs=jobs, mux_style=mux_style, om_report=om_report, tb_style=tb_style, tb_shards=tb_shards)
+    stages.append(("codegen", _ms(t0)))
+    state.model = model
+    state.sheet = sheet_title
+    for rel in out.written:
+        print(f"[WATCH]   M {rel}")
+    for rel in out.removed:
+        print(f"[WATCH]   D {rel}")
+    print(f"[WATCH] sheet={sheet_title} NI={len(model.pads_I)} NO={len(model.pads_IO)} {out.summary()}")
+    return stages
+
+
+def watch(
+    xlsx_path: str,
+    outdir: str,
+    pad_types: Dict[str, str],
+    mux_exclude: Set[str],
+    sheet: Optional[str] = None,
+    jobs: int = 1,
+    interval: float = 1.0,
+    mux_style: str = "unrolled",
+    all_errors: bool = False,
+    om_report: Sequence[str] = (),
+    tb_style: str = "unrolled",
+    tb_shards: Optional[str] = None,
+):
+    state = WatchState()
+    print(f"[WATCH] watching {xlsx_path} (Ctrl-C to stop)")
+    try:
+        while True:
+            try:
+                stages = regenerate(state, xlsx_path, outdir, pad_types, mux_exclude, sheet=sheet, jobs=jobs, mux_style=mux_style, all_errors=all_errors, om_report=om_report, tb_style=tb_style, tb_shards=tb_shards)
+                if stages:
+                    print("[WATCH] " + " ".join(f"{k}={v:.1f}ms" for k, v in stages))
+            except FileNotFoundError:
+                state.stat_sig = None
+            except SpecError as e:
+                print(e.pretty(), file=sys.stderr)
+            except Exception as e:
+                # 저장 도중의 불완전한 파일 등: 다음 변경 시 다시 시도
+                state.digest = None
+                print(f"[U901] {e}", file=sys.stderr)
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        print("[WATCH] stopped")
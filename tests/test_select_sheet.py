@@ -0,0 +1,39 @@
+import pytest
+
+openpyxl = pytest.importorskip("openpyxl")
+
+from generator.iomux.driver import select_sheet
+from generator.iomux.errors import SpecError
+from generator.iomux.excel import PROBE_ROWS
+
+HEADER = ("Pin Group", "Pin Name", "PAD type")
+
+
+def _workbook(*sheets):
+    # sheets: (title, 헤더 행 번호 또는 None)
+    wb = openpyxl.Workbook()
+    wb.remove(wb.active)
+    for title, row in sheets:
+        ws = wb.create_sheet(title)
+        ws["A1"] = "notes"
+        if row is not None:
+            for c, v in enumerate(HEADER, 1):
+                ws.cell(row, c, v)
+    return wb
+
+
+@pytest.mark.parametrize("deep", [True, False])
+def test_auto_select_keeps_workbook_order(deep):
+    # 탐침 범위 밖에 헤더가 있는 앞 시트가 뒤의 탐침 적중 시트보다 먼저 선택돼야 한다
+    row = PROBE_ROWS + 6 if deep else 2
+    wb = _workbook(("Notes", None), ("First", row), ("Second", 1))
+    ws, g = select_sheet(wb, None)
+    assert ws.title == "First"
+    assert [v for v in g[row - 1] if v] == list(HEADER)
+
+
+def test_auto_select_without_header():
+    wb = _workbook(("Notes", None), ("Other", None))
+    with pytest.raises(SpecError) as ei:
+        select_sheet(wb, None)
+    assert ei.value.eid == "F101"
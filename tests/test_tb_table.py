@@ -0,0 +1,62 @@
+import copy
+import os
+import re
+
+import pytest
+
+pytest.importorskip("numpy")
+pytest.importorskip("openpyxl")
+
+from generator.iomux.codegen import gen_tb_table as tbg
+from generator.iomux.driver import generate_outputs, load_model
+from generator.iomux.utils import is_io_test_name, padtype_key
+
+TEMPLATE = os.path.join(os.path.dirname(__file__), "..", "generator", "iomux", "excel_template", "operation_mode_and_test_multiplexing.xlsx")
+PAD_TYPES = {padtype_key(n): d for n, d in (("PDIDWUWSWCDG", "I"), ("PDXOEDG16RFRD", "IO"), ("PDDWUWSWCDG", "IO"), ("PDDWUWSWCDGS", "IO"))}
+EXCLUDE = {"OM", "XIN", "XOUT", "PORn"}
+
+
+@pytest.fixture(scope="module")
+def template_model():
+    return load_model(TEMPLATE, PAD_TYPES, EXCLUDE)[1]
+
+
+def _io_test_only(model):
+    m = copy.deepcopy(model)
+    for mode in m.modes:
+        m.modes[mode] = [sm for sm in m.modes[mode] if is_io_test_name(sm.name)]
+    return m
+
+
+def _localparams(sv):
+    return {k: int(v) for k, v in re.findall(r"localparam int (\w+)\s*=\s*(\d+);", sv)}
+
+
+def _all_disable_index(sv, params):
+    m = re.search(r"if \(\(tb_fo & masks\[(\w+)(?:-(\d+))?\]\) !== '0\)", sv)
+    assert m, "all-disable check not found"
+    return params[m.group(1)] - int(m.group(2) or 0)
+
+
+@pytest.mark.parametrize("io_test_only", [False, True])
+def test_all_disable_mask_is_loaded(template_model, io_test_only):
+    model = _io_test_only(template_model) if io_test_only else template_model
+    t = tbg.build_tb_table(model)
+    sv = "\n".join(tbg.iter_testbench_table_sv(t))
+    masks = list(tbg.iter_tb_masks_hex(t))
+    params = _localparams(sv)
+    assert len(masks) == len(t.tests) + 1
+    assert params["NMASK"] == len(masks)
+    # all-disable 검사는 masks 파일의 마지막(실제로 읽힌) 줄을 봐야 한다
+    assert _all_disable_index(sv, params) == len(masks) - 1
+
+
+@pytest.mark.parametrize("spec", [None, "2", "mode", "submode"])
+def test_io_test_only_model_shards(template_model, tmp_path, spec):
+    model = _io_test_only(template_model)
+    generate_outputs(model, "S", TEMPLATE, str(tmp_path), tb_style="table", tb_shards=spec)
+    ver = tmp_path / "verification"
+    steps = ver / ("tb_steps_all.hex" if spec else "tb_steps.hex")
+    assert steps.read_text().split() == [f"{tbg.step_word(tbg.OP_END):016x}"]
+    assert len((ver / "tb_masks.hex").read_text().split()) == 1
+    assert (ver / "tb_shards.json").exists() == bool(spec)